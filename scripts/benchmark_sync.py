@@ -0,0 +1,292 @@
+# ============================================================================
+# ⏱️ BENCHMARK DE LA SINCRONIZACIÓN CONTRA EL MOCK LOCAL DE CLIENTIFY
+# ============================================================================
+# - Arranca mock_clientify.py en un subproceso y ejecuta el main() real de
+#   oportunidades_oracle (deals) y actividades_oracle (tasks), cada fase en su
+#   propio proceso (RSS máximo por fase)
+# - Oracle se sustituye por SQLite (SumideroSQLite): upsert por ID que solo
+#   reescribe filas con ROW_HASH distinto, como merge_por_hash
+# - Por fase: registros/s, latencia p50/p99 de cada intento HTTP a la API
+#   (medida en el cliente, sin la espera del limitador), RSS máximo y
+#   respuestas servidas por el mock
+# - --salida guarda el resultado en JSON; --base compara contra uno anterior
+#
+# Uso:  python benchmark_sync.py --registros 2000 --prob-429 0.01 --salida base.json
+#       CLIENTIFY_CONCURRENCIA=40 python benchmark_sync.py --base base.json
+# Las variables de entorno de los scripts (CLIENTIFY_TASA_MAX, TAMANO_LOTE_MERGE,
+# MODO_DETALLES...) pasan tal cual a cada fase.
+# ============================================================================
+
+import argparse
+import contextlib
+import dataclasses
+import importlib
+import json
+import os
+import resource
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from mock_clientify import ConfigMock
+
+FASES = {
+    "deals": "oportunidades_oracle",
+    "tasks": "actividades_oracle",
+}
+PREFIJO_RESULTADO = "RESULTADO "
+
+
+# ============================================================================
+# SUMIDERO SQLITE (EN LUGAR DE ORACLE)
+# ============================================================================
+
+class SumideroSQLite:
+    """Tablas destino y watermarks en un fichero SQLite"""
+
+    def __init__(self, ruta):
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self.registros = 0
+
+    def _asegurar_tabla(self, tabla, columnas):
+        otras = ", ".join(f'"{c}"' for c in columnas if c != "ID")
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{tabla}" ("ID" INTEGER PRIMARY KEY, {otras})')
+
+    def merge(self, df, tabla):
+        """Upsert por ID que salta las filas con el mismo ROW_HASH; (insertados, actualizados, sin_cambios)"""
+        if df.empty:
+            return 0, 0, 0
+        columnas = df.columns.tolist()
+        nombres = ", ".join(f'"{c}"' for c in columnas)
+        binds = ", ".join("?" for _ in columnas)
+        asignaciones = ", ".join(f'"{c}" = excluded."{c}"' for c in columnas if c != "ID")
+        filas = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+        ids = df["ID"].tolist()
+
+        with self._lock:
+            self._asegurar_tabla(tabla, columnas)
+            existentes = 0
+            for i in range(0, len(ids), 900):
+                lote = ids[i:i + 900]
+                existentes += self._conn.execute(
+                    f'SELECT COUNT(*) FROM "{tabla}" WHERE "ID" IN ({", ".join("?" for _ in lote)})', lote
+                ).fetchone()[0]
+            antes = self._conn.total_changes
+            self._conn.executemany(
+                f'INSERT INTO "{tabla}" ({nombres}) VALUES ({binds}) '
+                f'ON CONFLICT("ID") DO UPDATE SET {asignaciones} '
+                f'WHERE "{tabla}"."ROW_HASH" IS NOT excluded."ROW_HASH"',
+                filas,
+            )
+            self._conn.commit()
+            cambios = self._conn.total_changes - antes
+            self.registros += len(df)
+
+        insertados = len(df) - existentes
+        actualizados = cambios - insertados
+        return insertados, actualizados, existentes - actualizados
+
+    def guardar_watermark(self, engine, tabla, watermark):
+        if watermark is None:
+            return
+        with self._lock:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS "SYNC_WATERMARKS" '
+                '("TABLA" TEXT PRIMARY KEY, "WATERMARK" TEXT, "ACTUALIZADO" TEXT)'
+            )
+            self._conn.execute(
+                'INSERT INTO "SYNC_WATERMARKS" VALUES (?, ?, datetime(\'now\')) '
+                'ON CONFLICT("TABLA") DO UPDATE SET "WATERMARK" = excluded."WATERMARK" '
+                'WHERE excluded."WATERMARK" > "SYNC_WATERMARKS"."WATERMARK"',
+                (tabla, watermark.isoformat()),
+            )
+            self._conn.commit()
+
+
+# ============================================================================
+# UNA FASE (PROCESO HIJO)
+# ============================================================================
+
+def _percentil(valores, p):
+    return float(np.percentile(valores, p)) if valores else None
+
+
+def ejecutar_fase(fase, url_api, trabajo):
+    """Ejecuta el main() real de la fase contra el mock y SQLite; devuelve sus métricas"""
+    os.environ.setdefault("CLIENTIFY_API_TOKEN", "benchmark")
+    for variable in ("ORACLE_USER", "ORACLE_PASSWORD", "ORACLE_DSN"):
+        os.environ.setdefault(variable, "benchmark")
+    os.environ.setdefault("COLA_TRABAJO_RUTA", os.path.join(trabajo, f"cola_{fase}.sqlite"))
+    os.environ.setdefault("CACHE_DETALLES_MB", "0")
+
+    from sqlalchemy import create_engine
+
+    import rate_limiter
+    import sincronizacion
+
+    modulo = importlib.import_module(FASES[fase])
+
+    ruta_sqlite = os.path.join(trabajo, "destino.sqlite")
+    sumidero = SumideroSQLite(ruta_sqlite)
+    sincronizacion.engine_oracle = create_engine(f"sqlite:///{ruta_sqlite}")
+    sincronizacion.ejecutar_merge_oracle = (
+        lambda config, df, engine, por_rangos=False: sumidero.merge(df, config.esquema.tabla)
+    )
+    sincronizacion.guardar_watermark = sumidero.guardar_watermark
+    sincronizacion.FECHA_DESDE = sincronizacion.FECHA_DESDE or "2000-01-01T00:00:00+00:00"
+    modulo.CONFIG = dataclasses.replace(modulo.CONFIG, url=f"{url_api}{fase}/")
+
+    # El cliente informa al limitador de la duración de cada intento HTTP
+    latencias = []
+    registrar_original = rate_limiter.LimitadorAdaptativo.registrar
+
+    def registrar_medido(self, status, duracion, *args, **kwargs):
+        if duracion:
+            latencias.append(duracion * 1000)
+        return registrar_original(self, status, duracion, *args, **kwargs)
+
+    rate_limiter.LimitadorAdaptativo.registrar = registrar_medido
+
+    inicio = time.perf_counter()
+    with open(os.path.join(trabajo, f"{fase}.log"), "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log):
+        modulo.main()
+    duracion = time.perf_counter() - inicio
+
+    return {
+        "registros": sumidero.registros,
+        "segundos": round(duracion, 3),
+        "registros_s": round(sumidero.registros / duracion, 1) if duracion else None,
+        "requests": len(latencias),
+        "latencia_p50_ms": _percentil(latencias, 50),
+        "latencia_p99_ms": _percentil(latencias, 99),
+        "rss_max_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+# ============================================================================
+# ORQUESTACIÓN (PROCESO PADRE)
+# ============================================================================
+
+def _estadisticas_mock(url_base):
+    with urllib.request.urlopen(f"{url_base}/__estadisticas", timeout=5) as r:
+        return json.loads(r.read())
+
+
+def _esperar_mock(url_base, proceso, plazo=120):
+    limite = time.monotonic() + plazo
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("El mock de Clientify terminó al arrancar")
+        try:
+            return _estadisticas_mock(url_base)
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("El mock de Clientify no respondió a tiempo")
+
+
+def _lanzar_fase(fase, url_api, trabajo):
+    salida = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--fase", fase, "--url", url_api, "--trabajo", trabajo],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    for linea in salida.stdout.splitlines():
+        if linea.startswith(PREFIJO_RESULTADO):
+            return json.loads(linea[len(PREFIJO_RESULTADO):])
+    ruta_log = os.path.join(trabajo, f"{fase}.log")
+    log = open(ruta_log, encoding="utf-8").read()[-2000:] if os.path.exists(ruta_log) else ""
+    raise RuntimeError(f"La fase {fase} falló:\n{log}\n{salida.stderr[-2000:]}")
+
+
+def _mostrar(resultados, base=None):
+    print(f"\n{'fase':<6} {'registros':>9} {'s':>8} {'reg/s':>8} {'requests':>9} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'RSS MB':>8}  mock")
+    for fase, r in resultados.items():
+        p50 = f"{r['latencia_p50_ms']:.0f}" if r["latencia_p50_ms"] is not None else "-"
+        p99 = f"{r['latencia_p99_ms']:.0f}" if r["latencia_p99_ms"] is not None else "-"
+        mock = ", ".join(f"{k}={v}" for k, v in sorted(r["mock"].items()))
+        print(f"{fase:<6} {r['registros']:>9} {r['segundos']:>8.1f} {r['registros_s'] or 0:>8.1f} "
+              f"{r['requests']:>9} {p50:>8} {p99:>8} {r['rss_max_mb']:>8.1f}  {mock}")
+        anterior = (base or {}).get(fase)
+        if anterior and anterior.get("registros_s"):
+            delta = (r["registros_s"] or 0) / anterior["registros_s"] - 1
+            print(f"{'':<6} vs base: {anterior['registros_s']:.1f} reg/s ({delta:+.1%}), "
+                  f"p99 {anterior['latencia_p99_ms'] or 0:.0f} ms, RSS {anterior['rss_max_mb']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la sincronización contra el mock local")
+    parser.add_argument("--fases", nargs="+", choices=list(FASES), default=list(FASES))
+    parser.add_argument("--puerto", type=int, default=8766)
+    parser.add_argument("--salida", help="Guardar resultados en este JSON")
+    parser.add_argument("--base", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--fase", help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    parser.add_argument("--trabajo", help=argparse.SUPPRESS)
+    defecto = ConfigMock(registros=1000)
+    for nombre, valor in vars(defecto).items():
+        opcion = "--" + nombre.replace("_", "-")
+        if isinstance(valor, bool):
+            parser.add_argument(opcion, action="store_true")
+        else:
+            parser.add_argument(opcion, type=type(valor), default=valor)
+    args = parser.parse_args()
+
+    if args.fase:
+        print(PREFIJO_RESULTADO + json.dumps(ejecutar_fase(args.fase, args.url, args.trabajo)))
+        return
+
+    opciones_mock = []
+    for nombre, valor in vars(defecto).items():
+        actual = getattr(args, nombre)
+        if isinstance(valor, bool):
+            opciones_mock += ["--" + nombre.replace("_", "-")] if actual else []
+        else:
+            opciones_mock += ["--" + nombre.replace("_", "-"), str(actual)]
+
+    url_base = f"http://127.0.0.1:{args.puerto}"
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    mock = subprocess.Popen(
+        [sys.executable, os.path.join(directorio, "mock_clientify.py"), "--puerto", str(args.puerto), *opciones_mock],
+        stdout=subprocess.DEVNULL, cwd=directorio,
+    )
+    resultados = {}
+    try:
+        _esperar_mock(url_base, mock)
+        with tempfile.TemporaryDirectory(prefix="benchmark_") as trabajo:
+            for fase in args.fases:
+                print(f"⏱️ {fase}: sincronizando {args.registros} registros contra el mock...")
+                antes = _estadisticas_mock(url_base)
+                resultado = _lanzar_fase(fase, f"{url_base}/v1/", trabajo)
+                despues = _estadisticas_mock(url_base)
+                resultado["mock"] = {
+                    k.split(".", 1)[1]: v - antes.get(k, 0)
+                    for k, v in despues.items() if k.startswith(f"{fase}.") and v != antes.get(k, 0)
+                }
+                resultados[fase] = resultado
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    base = None
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)["fases"]
+    _mostrar(resultados, base)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"config": {k: getattr(args, k) for k in vars(defecto)}, "fases": resultados}, f, indent=2)
+        print(f"\n💾 Resultados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
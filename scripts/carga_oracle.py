@@ -0,0 +1,300 @@
+# ============================================================================
+# 📥 CARGA DE STAGING CON EXECUTEMANY (ARRAY DML DE ORACLEDB)
+# ============================================================================
+# - Sustituye a DataFrame.to_sql: un INSERT con binds posicionales por lote
+#   de filas, en lugar de una sentencia por fila o INSERTs multi-fila gigantes
+# - setinputsizes desde el esquema (esquemas.py): NUMBER, VARCHAR2 con su tamaño
+#   y CLOB, así oracledb no re-deduce tipos ni re-asigna buffers en cada lote
+# - Staging: tabla temporal global (ON COMMIT DELETE ROWS) creada una sola
+#   vez; carga y MERGE van en la misma transacción y cada sesión ve solo
+#   sus filas, así que varias ejecuciones pueden convivir sin DDL
+# - ROW_HASH: hash del contenido de cada fila, guardado en una columna
+#   INVISIBLE de la tabla destino; el MERGE solo reescribe las filas cuyo
+#   hash cambió (los CLOB sin cambios no generan redo/undo)
+# - Las columnas volátiles (MODIFIED: cualquier automatización lo mueve)
+#   quedan fuera del hash; si el resto no cambió, solo se actualizan ellas
+# - Backfills: el modo se decide por ejecución (modo_por_rangos): por
+#   defecto cuando el punto de partida es manual (FECHA_DESDE / --desde);
+#   MERGE_POR_RANGOS=1/0 lo fuerza o lo desactiva. Cada lote se parte en
+#   rangos de ID disjuntos (hasta MERGE_FILAS_RANGO filas, repartido entre
+#   los hilos); cada rango se carga y mergea en su propia sesión del pool y
+#   su propia transacción (MERGE_HILOS a la vez, undo acotado al rango). Si
+#   un rango falla, los confirmados no se repiten al reanudar (MergeParcial)
+# - MERGE_PARALLEL_DML=<grado> añade PARALLEL DML al MERGE: bloquea la tabla
+#   entera, así que con rangos se mergea un rango a la vez
+# ============================================================================
+
+import contextvars
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import oracledb
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import text
+from sqlalchemy.types import CLOB, Float, Integer, Numeric, String
+
+from esquemas import texto as columna_texto
+from metricas import METRICAS
+
+FILAS_POR_LOTE = int(os.environ.get("FILAS_EXECUTEMANY", 5000))
+FILAS_POR_RANGO = int(os.environ.get("MERGE_FILAS_RANGO", 10000))
+MERGE_HILOS = int(os.environ.get("MERGE_HILOS", 4))
+MERGE_POR_RANGOS = os.environ.get("MERGE_POR_RANGOS")          # "1" / "0"; sin definir, según el origen
+GRADO_PARALLEL_DML = int(os.environ.get("MERGE_PARALLEL_DML", 0))
+SUFIJO_STAGING = "_STG"
+HASH = columna_texto("row_hash", 40)     # SHA-1 en hexadecimal
+COLUMNA_HASH = HASH.nombre
+COLUMNAS_VOLATILES = ("MODIFIED",)     # Fuera del hash; se actualizan aunque el hash coincida
+
+_stagings_listas = set()    # Stagings ya verificadas en este proceso
+_hashes_listos = set()      # Tablas destino con ROW_HASH ya verificado
+
+
+def tipo_bind(tipo):
+    """Tipo de bind de oracledb para el tipo Oracle (SQLAlchemy) de una columna"""
+    if isinstance(tipo, CLOB):
+        return oracledb.DB_TYPE_CLOB
+    if isinstance(tipo, (Integer, Numeric, Float)):
+        return oracledb.DB_TYPE_NUMBER
+    if isinstance(tipo, String) and tipo.length:
+        return tipo.length
+    return None
+
+
+def hash_filas(df):
+    """SHA-1 por fila sobre las columnas del DataFrame ya normalizado, salvo las volátiles"""
+    import pandas as pd     # Ya cargado por quien construyó `df`; no al importar el módulo
+    estables = [c for c in df.columns if c not in COLUMNAS_VOLATILES]
+    tabla = pa.Table.from_pandas(df[estables], preserve_index=False)
+    partes = [pc.fill_null(pc.cast(col, pa.string()), "\x00") for col in tabla.columns]
+    texto = pc.binary_join_element_wise(*partes, "\x1f")
+    hashes = [hashlib.sha1(fila.encode("utf-8")).hexdigest() for fila in texto.to_pylist()]
+    return pd.Series(hashes, index=df.index, dtype=object)
+
+
+def _columnas_tabla(conn, tabla):
+    """Columnas de la tabla (incluidas las INVISIBLE), o vacío si no existe"""
+    return {
+        col for (col,) in conn.execute(
+            text("SELECT COLUMN_NAME FROM USER_TAB_COLS WHERE TABLE_NAME = :tabla"),
+            {"tabla": tabla},
+        )
+    }
+
+
+def crear_tabla(conn, tabla, esquema, temporal=False):
+    """CREATE TABLE con las columnas y tipos del esquema"""
+    conn.exec_driver_sql(esquema.ddl(tabla, temporal=temporal))
+
+
+def asegurar_staging(conn, table_name, esquema):
+    """
+    Devuelve el nombre de la staging de la tabla, creándola si no existe.
+    Solo se recrea (DROP + CREATE) si sus columnas ya no coinciden con el esquema.
+    """
+    staging = f"{table_name}{SUFIJO_STAGING}"
+    if staging in _stagings_listas:
+        return staging
+
+    esquema_staging = esquema.ampliado(HASH)
+    existentes = _columnas_tabla(conn, staging)
+
+    if existentes != set(esquema_staging.nombres):
+        if existentes:
+            conn.exec_driver_sql(f'DROP TABLE "{staging}"')
+        crear_tabla(conn, staging, esquema_staging, temporal=True)
+
+    _stagings_listas.add(staging)
+    return staging
+
+
+def insertar_por_lotes(conn, tabla, df, esquema, filas_por_lote=FILAS_POR_LOTE):
+    """
+    Inserta el DataFrame en la tabla con cursor.executemany (sin commit).
+    Las columnas del df deben ser columnas del esquema (más ROW_HASH).
+    """
+    tipos = {c.nombre: c.tipo_oracle for c in esquema.ampliado(HASH).columnas}
+    cols = df.columns.tolist()
+    nombres = ", ".join(f'"{c}"' for c in cols)
+    binds = ", ".join(f":{i}" for i in range(1, len(cols) + 1))
+    sql = f'INSERT INTO "{tabla}" ({nombres}) VALUES ({binds})'
+
+    # object + None: enteros/floats nativos de Python y NULL en lugar de NaN
+    filas = list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+    with METRICAS.fase("carga_staging"):
+        cursor = conn.connection.cursor()
+        try:
+            for inicio in range(0, len(filas), filas_por_lote):
+                cursor.setinputsizes(*[tipo_bind(tipos.get(c)) for c in cols])
+                cursor.executemany(sql, filas[inicio:inicio + filas_por_lote])
+        finally:
+            cursor.close()
+        METRICAS.sumar("filas", len(filas))
+
+    return len(filas)
+
+
+def asegurar_columna_hash(conn, table_name):
+    """Añade ROW_HASH como columna INVISIBLE a la tabla destino si aún no la tiene"""
+    if table_name in _hashes_listos:
+        return
+    if COLUMNA_HASH not in _columnas_tabla(conn, table_name):
+        tipo = HASH.tipo_oracle.compile(dialect=conn.dialect)
+        conn.exec_driver_sql(f'ALTER TABLE "{table_name}" ADD ("{COLUMNA_HASH}" {tipo} INVISIBLE)')
+    _hashes_listos.add(table_name)
+
+
+def merge_por_hash(conn, table_name, staging, cols, grado_paralelo=0):
+    """
+    MERGE de la staging en la tabla destino por ID (sin commit).
+    Las filas existentes solo se reescriben si su ROW_HASH cambió; si no,
+    solo se actualizan las columnas volátiles que hayan cambiado.
+    Con `grado_paralelo` el MERGE lleva PARALLEL (requiere PARALLEL DML en la sesión).
+    Devuelve (insertados, actualizados, sin_cambios).
+    """
+    datos = [c for c in cols if c != COLUMNA_HASH]
+    set_clause = ", ".join(f'T."{c}"=S."{c}"' for c in datos + [COLUMNA_HASH] if c != "ID")
+    ins_cols = ", ".join(f'"{c}"' for c in datos + [COLUMNA_HASH])
+    ins_vals = ", ".join(f'S."{c}"' for c in datos + [COLUMNA_HASH])
+    pista = f"/*+ PARALLEL(T, {grado_paralelo}) */ " if grado_paralelo else ""
+
+    # Cambios solo en columnas volátiles: un MERGE aparte que no toca los CLOB.
+    # Con PARALLEL DML no se puede volver a modificar la tabla en la misma
+    # transacción (ORA-12838), así que esas filas van en el MERGE principal
+    volatiles = [c for c in COLUMNAS_VOLATILES if c in cols]
+    distintos = " OR ".join(f'DECODE(T."{c}", S."{c}", 0, 1) = 1' for c in volatiles)
+    condicion = f'T."{COLUMNA_HASH}" IS NULL OR T."{COLUMNA_HASH}" <> S."{COLUMNA_HASH}"'
+    if grado_paralelo and volatiles:
+        condicion += f" OR {distintos}"
+
+    with METRICAS.fase("merge"):
+        total, nuevos = conn.execute(text(f"""
+            SELECT COUNT(*), COUNT(*) - COUNT(T."ID")
+            FROM "{staging}" S LEFT JOIN "{table_name}" T ON T."ID" = S."ID"
+        """)).fetchone()
+
+        resultado = conn.execute(text(f"""
+            MERGE {pista}INTO "{table_name}" T
+            USING "{staging}" S
+            ON (T."ID" = S."ID")
+            WHEN MATCHED THEN
+                UPDATE SET {set_clause}
+                WHERE {condicion}
+            WHEN NOT MATCHED THEN
+                INSERT ({ins_cols}) VALUES ({ins_vals})
+        """))
+
+        afectados = resultado.rowcount
+
+        if volatiles and not grado_paralelo:
+            solo_volatiles = conn.execute(text(f"""
+                MERGE INTO "{table_name}" T
+                USING "{staging}" S
+                ON (T."ID" = S."ID")
+                WHEN MATCHED THEN
+                    UPDATE SET {", ".join(f'T."{c}"=S."{c}"' for c in volatiles)}
+                    WHERE T."{COLUMNA_HASH}" = S."{COLUMNA_HASH}" AND ({distintos})
+            """)).rowcount
+            METRICAS.sumar("solo_volatiles", solo_volatiles)
+
+        METRICAS.sumar("filas", total)
+        METRICAS.sumar("insertados", nuevos)
+        METRICAS.sumar("actualizados", afectados - nuevos)
+        METRICAS.sumar("sin_cambios", total - afectados)
+    return nuevos, afectados - nuevos, total - afectados
+
+
+# --- MERGE POR RANGOS DE ID (BACKFILLS) ---
+
+class MergeParcial(Exception):
+    """Parte de los rangos se confirmó y parte falló; `cargado` son las filas ya confirmadas"""
+
+    def __init__(self, cargado, errores):
+        detalle = "; ".join(f"ID {desde}-{hasta}: {error}" for desde, hasta, error in errores)
+        super().__init__(f"{len(errores)} rangos de ID sin mergear ({detalle})")
+        self.cargado = cargado
+        self.errores = errores
+
+
+def modo_por_rangos(origen):
+    """MERGE por rangos en esta ejecución: backfills (origen 'manual') salvo que MERGE_POR_RANGOS diga otra cosa"""
+    if MERGE_POR_RANGOS is not None:
+        return MERGE_POR_RANGOS.strip().lower() in ("1", "true", "si", "sí")
+    return origen == "manual"
+
+
+def rangos_por_id(df, filas_por_rango=FILAS_POR_RANGO):
+    """El df ordenado por ID y partido en trozos contiguos: rangos de ID disjuntos"""
+    ordenado = df.sort_values("ID", kind="stable")
+    return [ordenado.iloc[i:i + filas_por_rango] for i in range(0, len(ordenado), filas_por_rango)]
+
+
+def cargar_y_mergear(conn, table_name, df, esquema, grado_paralelo=0):
+    """
+    Staging + MERGE del df en una sola transacción de `conn`, con commit.
+    La staging y ROW_HASH deben existir ya (su DDL haría commit a mitad).
+    """
+    staging = asegurar_staging(conn, table_name, esquema)
+    if grado_paralelo:
+        # Solo se puede activar al inicio de una transacción
+        conn.exec_driver_sql("ALTER SESSION ENABLE PARALLEL DML")
+    try:
+        insertar_por_lotes(conn, staging, df, esquema)
+        resultado = merge_por_hash(conn, table_name, staging, df.columns.tolist(), grado_paralelo)
+        conn.commit()  # Vacía la staging (ON COMMIT DELETE ROWS)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if grado_paralelo:
+            # La sesión vuelve al pool: que no herede PARALLEL DML
+            conn.exec_driver_sql("ALTER SESSION DISABLE PARALLEL DML")
+    return resultado
+
+
+def merge_por_rangos(engine, table_name, df, esquema, filas_por_rango=FILAS_POR_RANGO,
+                     hilos=MERGE_HILOS, grado_paralelo=GRADO_PARALLEL_DML):
+    """
+    MERGE del df por rangos de ID, cada uno en su sesión del pool y con su
+    propio commit (`hilos` rangos a la vez; un lote pequeño se reparte entre
+    todos). Devuelve (insertados, actualizados, sin_cambios); si algún rango
+    falla, los demás quedan confirmados y se lanza MergeParcial con sus filas.
+    """
+    if grado_paralelo:
+        hilos = 1   # PARALLEL DML bloquea la tabla: los rangos se esperarían unos a otros
+    filas_por_rango = max(1, min(filas_por_rango, -(-len(df) // max(1, hilos))))
+
+    # DDL (implica commit) una sola vez, antes de que los rangos carguen
+    with engine.connect() as conn:
+        asegurar_columna_hash(conn, table_name)
+        asegurar_staging(conn, table_name, esquema)
+
+    def _rango(parte):
+        with engine.connect() as conn:
+            return cargar_y_mergear(conn, table_name, parte, esquema, grado_paralelo)
+
+    totales = [0, 0, 0]
+    confirmados, errores = [], []
+    with ThreadPoolExecutor(max_workers=max(1, hilos), thread_name_prefix="merge") as pool:
+        # Cada rango con su copia del contexto: sus métricas caen en la fase en curso
+        futuros = {
+            pool.submit(contextvars.copy_context().run, _rango, parte): parte
+            for parte in rangos_por_id(df, filas_por_rango)
+        }
+        for futuro in as_completed(futuros):
+            parte = futuros[futuro]
+            try:
+                for i, valor in enumerate(futuro.result()):
+                    totales[i] += valor
+                confirmados.extend(parte["ID"].tolist())
+            except Exception as e:
+                errores.append((parte["ID"].iloc[0], parte["ID"].iloc[-1], e))
+        METRICAS.sumar("rangos", len(futuros))
+        METRICAS.sumar("rangos_fallidos", len(errores))
+
+    if errores:
+        raise MergeParcial(df[df["ID"].isin(confirmados)], errores)
+    return tuple(totales)
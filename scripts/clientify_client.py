@@ -0,0 +1,138 @@
+# ============================================================================
+# 🌐 CLIENTE CLIENTIFY ASÍNCRONO (COMPARTIDO POR LOS SCRIPTS DE SINCRONIZACIÓN)
+# ============================================================================
+# - Una sola sesión HTTP con keep-alive (pool de conexiones reutilizadas)
+# - Concurrencia acotada: decenas de requests en vuelo sin un hilo por request
+# - Ritmo adaptativo compartido (LimitadorAdaptativo) en lugar de sleeps fijos
+# - Timeout por intento + plazo total por request (incluye reintentos)
+# - Política de reintentos configurable por script
+# - Contadores por fase (metricas.py): requests, intentos, reintentos, 429,
+#   5xx, errores de red y bytes recibidos
+# ============================================================================
+
+import asyncio
+import time
+
+import aiohttp
+import orjson
+
+from metricas import METRICAS
+from rate_limiter import LimitadorAdaptativo
+from reintentos import PoliticaReintentos
+
+URL_API = "https://api.clientify.net/v1/"
+
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+
+
+class ClientifyClient:
+    """
+    Cliente asíncrono de la API de Clientify.
+
+    Uso:
+        async with ClientifyClient(token, concurrencia=20) as cliente:
+            data = await cliente.get_json(url, params={...})
+
+    `get_json` devuelve el JSON (dict) o None si el request no tuvo éxito
+    tras aplicar la política de reintentos. Si se supera el plazo total
+    del request lanza asyncio.TimeoutError.
+
+    `concurrencia` es el tope duro de conexiones; dentro de ese tope el
+    limitador decide cuántas requests hay en vuelo y a qué ritmo.
+    """
+
+    def __init__(self, api_token, concurrencia=20, timeout=30, plazo=None, politica=None, limitador=None):
+        self.api_token = api_token
+        self.concurrencia = concurrencia
+        self.timeout = timeout
+        self.plazo = plazo
+        self.politica = politica or PoliticaReintentos()
+        self.limitador = limitador or LimitadorAdaptativo(concurrencia_max=concurrencia)
+        self._session = None
+
+    async def __aenter__(self):
+        conector = aiohttp.TCPConnector(
+            limit=self.concurrencia,
+            keepalive_timeout=60,
+            ttl_dns_cache=300,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=conector,
+            headers={
+                "Authorization": f"Token {self.api_token}",
+                "Content-Type": "application/json",
+            },
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+        self._session = None
+
+    async def get_json(self, url, params=None, timeout=None, plazo=None):
+        """
+        GET con reintentos. El plazo cubre todos los intentos del request y
+        empieza a contar cuando sale el primer intento (no en la cola del limitador).
+        """
+        plazo = plazo if plazo is not None else self.plazo
+        timeout = timeout or self.timeout
+        politica = self.politica
+        limite = None
+        METRICAS.sumar("http_requests")
+
+        for intento in range(politica.max_intentos):
+            ultimo = intento == politica.max_intentos - 1
+            if intento:
+                METRICAS.sumar("http_reintentos")
+            await self.limitador.adquirir()
+            METRICAS.sumar("http_intentos")
+            inicio = time.monotonic()
+            if plazo:
+                limite = limite or inicio + plazo
+                restante = limite - inicio
+                if restante <= 0:
+                    self.limitador.liberar()
+                    raise asyncio.TimeoutError()
+                timeout_intento = min(timeout, restante)
+            else:
+                timeout_intento = timeout
+
+            status, headers, reintentar_red = None, None, False
+            juzgar = True       # False: el intento no dice nada del servidor
+            try:
+                async with self._session.get(
+                    url,
+                    params=params,
+                    timeout=aiohttp.ClientTimeout(total=timeout_intento),
+                ) as r:
+                    status, headers = r.status, r.headers
+                    if r.status == 429:
+                        METRICAS.sumar("http_429")
+                    elif r.status >= 500:
+                        METRICAS.sumar("http_5xx")
+                    if r.status == 200:
+                        cuerpo = await r.read()
+                        METRICAS.sumar("http_bytes", len(cuerpo))
+                        return orjson.loads(cuerpo)
+                    if r.status not in ESTADOS_REINTENTABLES:
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                METRICAS.sumar("http_errores_red")
+                if limite and time.monotonic() >= limite:
+                    # Se agotó nuestro plazo, no el del servidor: no es saturación
+                    juzgar = False
+                    raise asyncio.TimeoutError()
+                if not politica.reintentar_errores_red:
+                    return None
+                reintentar_red = not ultimo
+            except asyncio.CancelledError:
+                juzgar = False
+                raise
+            finally:
+                if juzgar:
+                    self.limitador.registrar(status, time.monotonic() - inicio, headers)
+                else:
+                    self.limitador.liberar()
+            if reintentar_red:
+                await asyncio.sleep(politica.espera(intento))
+        return None
@@ -0,0 +1,198 @@
+# ============================================================================
+# 📬 COLA DE TRABAJO DURABLE (SQLITE) CON REINTENTOS Y DEAD-LETTER
+# ============================================================================
+# - 'descargado': detalle bajado pero aún no mergeado (se mergea en la próxima
+#   ejecución si esta se cae antes del MERGE)
+# - 'pendiente': el GET de detalle falló; se reintenta con backoff
+# - 'muerto': superó COLA_MAX_INTENTOS; queda para inspección manual. Los
+#   intentos se conservan: un ID muerto que vuelve a fallar sigue muerto, y
+#   la sincronización no vuelve a pedir su detalle aunque se vuelva a listar
+#
+# Inspección:  python cola_trabajo.py [deals|tasks]
+# ============================================================================
+
+import json
+import os
+import sqlite3
+import sys
+import time
+
+RUTA_DEFECTO = os.path.join(".cache", "cola_trabajo.sqlite")
+MAX_INTENTOS_DEFECTO = 5
+ESPERA_BASE = 300       # 5 min, se duplica en cada intento fallido
+ESPERA_MAX = 6 * 3600
+FILAS_POR_LECTURA = 500     # Detalles sin mergear leídos de cada vez al reanudar
+
+PENDIENTE = "pendiente"
+DESCARGADO = "descargado"
+MUERTO = "muerto"
+
+
+class ColaTrabajo:
+    """Estado durable por (recurso, id) entre ejecuciones de la sincronización"""
+
+    def __init__(self, ruta, recurso, max_intentos=MAX_INTENTOS_DEFECTO, commit_cada=100):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.recurso = recurso
+        self.max_intentos = max_intentos
+        self.commit_cada = commit_cada
+        self._pendientes_commit = 0
+
+        self._conn = sqlite3.connect(ruta)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cola (
+                recurso TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                estado TEXT NOT NULL,
+                intentos INTEGER NOT NULL DEFAULT 0,
+                proximo_intento REAL NOT NULL DEFAULT 0,
+                ultimo_error TEXT,
+                detalle TEXT,
+                actualizado REAL NOT NULL,
+                PRIMARY KEY (recurso, id)
+            )
+        """)
+        self._conn.commit()
+
+    @classmethod
+    def desde_entorno(cls, recurso):
+        ruta = os.environ.get("COLA_TRABAJO_RUTA", RUTA_DEFECTO)
+        max_intentos = int(os.environ.get("COLA_MAX_INTENTOS", MAX_INTENTOS_DEFECTO))
+        return cls(ruta, recurso, max_intentos)
+
+    # --- Lectura al arrancar ---
+
+    def contar(self, estado):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM cola WHERE recurso = ? AND estado = ?", (self.recurso, estado)
+        ).fetchone()[0]
+
+    def descargados(self, por_lectura=FILAS_POR_LECTURA):
+        """
+        Detalles bajados en ejecuciones anteriores que no llegaron a mergearse,
+        leídos por trozos ordenados por ID (nunca toda la cola en memoria).
+        Los que se guarden mientras se recorre no se entregan.
+        """
+        inicio = time.time()
+        ultimo = None
+        while True:
+            filas = self._conn.execute(
+                "SELECT id, detalle FROM cola WHERE recurso = ? AND estado = ? AND actualizado <= ? "
+                "AND (? IS NULL OR id > ?) ORDER BY id LIMIT ?",
+                (self.recurso, DESCARGADO, inicio, ultimo, ultimo, por_lectura),
+            ).fetchall()
+            for _, detalle in filas:
+                yield json.loads(detalle)
+            if len(filas) < por_lectura:
+                return
+            ultimo = filas[-1][0]
+
+    def listos_para_reintento(self):
+        """IDs fallidos cuyo backoff ya venció"""
+        filas = self._conn.execute(
+            "SELECT id FROM cola WHERE recurso = ? AND estado = ? AND proximo_intento <= ?",
+            (self.recurso, PENDIENTE, time.time()),
+        )
+        return [item_id for (item_id,) in filas]
+
+    def ids_muertos(self):
+        """IDs en dead-letter: no se vuelven a pedir aunque reaparezcan en el listado"""
+        filas = self._conn.execute(
+            "SELECT id FROM cola WHERE recurso = ? AND estado = ?", (self.recurso, MUERTO)
+        )
+        return {item_id for (item_id,) in filas}
+
+    def muertos(self):
+        """[(id, intentos, ultimo_error, actualizado)] en dead-letter"""
+        return self._conn.execute(
+            "SELECT id, intentos, ultimo_error, actualizado FROM cola "
+            "WHERE recurso = ? AND estado = ? ORDER BY actualizado",
+            (self.recurso, MUERTO),
+        ).fetchall()
+
+    # --- Escritura durante la ejecución ---
+
+    def guardar_descargado(self, detalle):
+        """Persiste un detalle recién bajado hasta que se confirme su MERGE"""
+        self._conn.execute(
+            """
+            INSERT INTO cola (recurso, id, estado, intentos, detalle, actualizado)
+            VALUES (?, ?, ?, 0, ?, ?)
+            ON CONFLICT (recurso, id) DO UPDATE SET
+                estado = excluded.estado, detalle = excluded.detalle,
+                ultimo_error = NULL, actualizado = excluded.actualizado
+            """,
+            (self.recurso, int(detalle["id"]), DESCARGADO,
+             json.dumps(detalle, ensure_ascii=False), time.time()),
+        )
+        self._tocar()
+
+    def registrar_fallo(self, item_id, error):
+        """Suma un intento; programa el reintento o lo pasa a dead-letter (del que no sale)"""
+        fila = self._conn.execute(
+            "SELECT intentos, estado FROM cola WHERE recurso = ? AND id = ?",
+            (self.recurso, int(item_id)),
+        ).fetchone()
+        intentos = (fila[0] if fila else 0) + 1
+        muerto = intentos >= self.max_intentos or (fila is not None and fila[1] == MUERTO)
+        estado = MUERTO if muerto else PENDIENTE
+        espera = min(ESPERA_MAX, ESPERA_BASE * (2 ** (intentos - 1)))
+        ahora = time.time()
+
+        self._conn.execute(
+            """
+            INSERT INTO cola (recurso, id, estado, intentos, proximo_intento, ultimo_error, actualizado)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (recurso, id) DO UPDATE SET
+                estado = excluded.estado, intentos = excluded.intentos,
+                proximo_intento = excluded.proximo_intento,
+                ultimo_error = excluded.ultimo_error, actualizado = excluded.actualizado
+            """,
+            (self.recurso, int(item_id), estado, intentos, ahora + espera, error, ahora),
+        )
+        self._tocar()
+        return estado
+
+    def confirmar(self, ids):
+        """Quita de la cola los IDs ya mergeados en Oracle (incluye pendientes/muertos que se recuperaron)"""
+        self._conn.executemany(
+            "DELETE FROM cola WHERE recurso = ? AND id = ?",
+            [(self.recurso, int(i)) for i in ids],
+        )
+        self._conn.commit()
+
+    def _tocar(self):
+        self._pendientes_commit += 1
+        if self._pendientes_commit >= self.commit_cada:
+            self._conn.commit()
+            self._pendientes_commit = 0
+
+    def cerrar(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def resumen(self):
+        filas = self._conn.execute(
+            "SELECT estado, COUNT(*) FROM cola WHERE recurso = ? GROUP BY estado",
+            (self.recurso,),
+        ).fetchall()
+        conteo = dict(filas)
+        return (
+            f"{conteo.get(DESCARGADO, 0)} sin mergear, "
+            f"{conteo.get(PENDIENTE, 0)} por reintentar, "
+            f"{conteo.get(MUERTO, 0)} en dead-letter"
+        )
+
+
+if __name__ == "__main__":
+    for recurso in sys.argv[1:] or ["deals", "tasks"]:
+        cola = ColaTrabajo.desde_entorno(recurso)
+        print(f"📬 {recurso}: {cola.resumen()}")
+        for item_id, intentos, error, actualizado in cola.muertos():
+            fecha = time.strftime("%Y-%m-%d %H:%M", time.localtime(actualizado))
+            print(f"   ✗ {item_id} | {intentos} intentos | {fecha} | {error}")
+        cola.cerrar()
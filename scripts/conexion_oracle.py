@@ -0,0 +1,71 @@
+# ============================================================================
+# 🔌 POOL DE CONEXIONES ORACLE COMPARTIDO (ORACLEDB + SQLALCHEMY)
+# ============================================================================
+# - Un pool de oracledb por proceso; el engine de SQLAlchemy no abre
+#   conexiones propias (creator=pool.acquire + NullPool): al cerrar una
+#   conexión la sesión vuelve al pool y la siguiente fase la reutiliza sin
+#   handshake ni login
+# - Caché de sentencias por sesión (ORACLE_STMT_CACHE): el INSERT de la
+#   staging, el MERGE y las consultas de control no se re-parsean en cada lote
+# - arraysize / prefetchrows por defecto para todos los cursores (los que
+#   fijan los suyos, como la exportación, los mantienen)
+# - Tamaño acotado (ORACLE_POOL_MAX): las fases que abren conexiones en
+#   paralelo esperan a que quede una libre en vez de abrir sesiones de más
+# ============================================================================
+
+import os
+
+import oracledb
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+POOL_MIN = int(os.environ.get("ORACLE_POOL_MIN", 1))
+POOL_MAX = int(os.environ.get("ORACLE_POOL_MAX", 4))
+STMT_CACHE = int(os.environ.get("ORACLE_STMT_CACHE", 50))
+ARRAYSIZE = int(os.environ.get("ORACLE_ARRAYSIZE", 1000))
+PREFETCH = int(os.environ.get("ORACLE_PREFETCH", ARRAYSIZE))
+ESPERA_CONEXION_S = int(os.environ.get("ORACLE_POOL_ESPERA_S", 300))
+
+
+def crear_pool(usuario, password, dsn, minimo=POOL_MIN, maximo=POOL_MAX):
+    """Pool de sesiones oracledb con caché de sentencias; acquire() espera si está lleno"""
+    oracledb.defaults.arraysize = ARRAYSIZE
+    oracledb.defaults.prefetchrows = PREFETCH
+    return oracledb.create_pool(
+        user=usuario,
+        password=password,
+        dsn=dsn,
+        min=min(minimo, maximo),
+        max=maximo,
+        increment=1,
+        stmtcachesize=STMT_CACHE,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        wait_timeout=ESPERA_CONEXION_S * 1000,
+    )
+
+
+def crear_engine(usuario, password, dsn, minimo=POOL_MIN, maximo=POOL_MAX):
+    """
+    Engine de SQLAlchemy sobre un pool oracledb propio. `engine.pool_oracle`
+    expone el pool (para cerrarlo o consultar sesiones abiertas/ocupadas).
+    """
+    pool = crear_pool(usuario, password, dsn, minimo, maximo)
+    engine = create_engine("oracle+oracledb://", creator=pool.acquire, poolclass=NullPool)
+    engine.pool_oracle = pool
+    return engine
+
+
+def cerrar_engine(engine):
+    """Cierra el pool del engine (si lo tiene); las sesiones se liberan en Oracle"""
+    pool = getattr(engine, "pool_oracle", None)
+    engine.dispose()
+    if pool is not None:
+        pool.close(force=True)
+
+
+def resumen_pool(engine):
+    """Sesiones abiertas/ocupadas del pool, para los logs de fin de ejecución"""
+    pool = getattr(engine, "pool_oracle", None)
+    if pool is None:
+        return "sin pool"
+    return f"{pool.opened} sesiones abiertas (máx. {pool.max}), {pool.busy} ocupadas"
@@ -0,0 +1,214 @@
+# ============================================================================
+# 🗂️ DATASET PARQUET INCREMENTAL (PARTICIONADO HIVE) EN OBJECT STORAGE
+# ============================================================================
+# Estructura en el bucket, por tabla:
+#   <prefijo>/mes_creacion=YYYY-MM/base-<marca>.parquet    foto completa
+#   <prefijo>/mes_creacion=YYYY-MM/delta-<marca>.parquet   cambios posteriores
+#   <prefijo>/_manifest.json                               qué ficheros leer
+#
+# - Cada ejecución exporta solo filas con MODIFIED posterior al watermark de
+#   exportación (menos un día de solape) como un delta por partición tocada
+# - Lectura: base + deltas de cada partición, quedándose con la última versión
+#   de cada ID (mayor MODIFIED); el manifest lo declara en "clave"/"version"
+# - Compactación: una partición con COMPACTAR_CADA deltas se vuelve a exportar
+#   entera desde Oracle como nueva base y sus deltas se borran
+# - El manifest se sube al final: los lectores nunca ven ficheros a medias
+# ============================================================================
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from exportacion_parquet import lotes_arrow
+from subida_oci import subir_archivo
+from watermark import guardar_watermark, leer_watermark, parsear_fecha
+
+COLUMNA_PARTICION = "mes_creacion"
+PARTICION_NULA = "__HIVE_DEFAULT_PARTITION__"
+COMPACTAR_CADA = int(os.environ.get("EXPORT_COMPACTAR_CADA", 7))
+SOLAPE = timedelta(days=1)      # MODIFIED es texto con offset local: se filtra por día
+MANIFEST = "_manifest.json"
+
+
+def _clave_watermark(esquema):
+    return f"{esquema.tabla}__PARQUET"
+
+
+def _particiones(lote):
+    """Valor de partición (YYYY-MM de CREATED) de cada fila del lote"""
+    meses = pc.utf8_slice_codeunits(lote.column("CREATED"), 0, 7)
+    return pc.fill_null(meses, PARTICION_NULA)
+
+
+def _filtro_particion(mes):
+    if mes == PARTICION_NULA:
+        return '"CREATED" IS NULL', {}
+    return 'SUBSTR("CREATED", 1, 7) = :mes', {"mes": mes}
+
+
+def _maximo_modified(lote, actual):
+    fechas = [parsear_fecha(v) for v in lote.column("MODIFIED").to_pylist()]
+    fechas = [f for f in fechas if f is not None]
+    if actual is not None:
+        fechas.append(actual)
+    return max(fechas) if fechas else None
+
+
+# --- OBJECT STORAGE ---
+
+def leer_manifest(client, namespace, bucket, prefijo):
+    """Manifest actual del dataset, o None si todavía no existe"""
+    try:
+        respuesta = client.get_object(namespace, bucket, f"{prefijo}/{MANIFEST}")
+    except Exception as e:
+        if getattr(e, "status", None) == 404:
+            return None
+        raise
+    return json.loads(respuesta.data.content)
+
+
+def _subir(client, namespace, bucket, nombre, ruta):
+    subir_archivo(client, namespace, bucket, nombre, ruta)
+
+
+def _borrar(client, namespace, bucket, nombres):
+    for nombre in nombres:
+        try:
+            client.delete_object(namespace, bucket, nombre)
+        except Exception as e:
+            print(f"   ⚠️ No se pudo borrar {nombre}: {e}")
+
+
+# --- ESCRITURA LOCAL ---
+
+def _escribir_particionado(engine, esquema, directorio, tipo, marca, where=None, params=None):
+    """
+    Exporta la consulta a un Parquet por partición en `directorio`.
+    Devuelve (esperados, escritos, {mes: (ruta, registros)}, max_modified).
+    """
+    esquema_arrow = esquema.esquema_arrow()
+    escritores, archivos = {}, {}
+    escritos, maximo = 0, None
+    with lotes_arrow(engine, esquema, where=where, params=params) as (esperados, lotes):
+        try:
+            for lote in lotes:
+                claves = _particiones(lote)
+                for mes in pc.unique(claves).to_pylist():
+                    parte = lote.filter(pc.equal(claves, mes))
+                    if mes not in escritores:
+                        ruta = os.path.join(directorio, f"{COLUMNA_PARTICION}={mes}", f"{tipo}-{marca}.parquet")
+                        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+                        escritores[mes] = pq.ParquetWriter(ruta, esquema_arrow)
+                        archivos[mes] = [ruta, 0]
+                    escritores[mes].write_table(parte)
+                    archivos[mes][1] += parte.num_rows
+                escritos += lote.num_rows
+                maximo = _maximo_modified(lote, maximo)
+        finally:
+            for writer in escritores.values():
+                writer.close()
+
+    return esperados, escritos, {mes: tuple(v) for mes, v in archivos.items()}, maximo
+
+
+# --- EXPORTACIÓN INCREMENTAL ---
+
+def exportar_incremental(engine, esquema, client, namespace, bucket, prefijo):
+    """
+    Sube los cambios desde el último watermark de exportación como deltas,
+    compacta las particiones que lo necesiten y publica el manifest.
+    Devuelve un resumen {modo, registros, particiones, compactadas, bytes}.
+    """
+    marca = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    manifest = leer_manifest(client, namespace, bucket, prefijo)
+    watermark = leer_watermark(engine, _clave_watermark(esquema)) if manifest else None
+
+    if manifest is None or watermark is None:
+        modo, tipo, where, params = "inicial", "base", None, None
+        manifest = {"particiones": {}}
+    else:
+        modo, tipo = "incremental", "delta"
+        where = 'SUBSTR("MODIFIED", 1, 10) >= :dia'
+        params = {"dia": (watermark - SOLAPE).strftime("%Y-%m-%d")}
+
+    particiones = manifest["particiones"]
+    subidos, obsoletos, bytes_subidos = [], [], 0
+
+    with tempfile.TemporaryDirectory(prefix="dataset_") as directorio:
+        esperados, escritos, archivos, maximo = _escribir_particionado(
+            engine, esquema, directorio, tipo, marca, where, params
+        )
+        if escritos != esperados:
+            raise RuntimeError(f"COUNT(*) {esperados:,} ≠ exportados {escritos:,}")
+
+        for mes, (ruta, registros) in archivos.items():
+            nombre = f"{prefijo}/{os.path.relpath(ruta, directorio)}"
+            entrada = particiones.setdefault(mes, {"base": None, "deltas": []})
+            if tipo == "base":
+                if entrada["base"]:
+                    obsoletos.append(entrada["base"])
+                obsoletos.extend(entrada["deltas"])
+                entrada.update(base=nombre, deltas=[])
+            else:
+                entrada["deltas"].append(nombre)
+            subidos.append((nombre, ruta))
+
+        # Compactación: nueva base desde Oracle para particiones con muchos deltas
+        compactadas = [mes for mes, e in particiones.items() if len(e["deltas"]) >= COMPACTAR_CADA]
+        for mes in compactadas:
+            where_mes, params_mes = _filtro_particion(mes)
+            esperados_mes, escritos_mes, base, _ = _escribir_particionado(
+                engine, esquema, directorio, "base", marca, where_mes, params_mes
+            )
+            # Una base corta sustituiría a base + deltas: se borrarían filas publicadas
+            if escritos_mes != esperados_mes:
+                raise RuntimeError(f"{mes}: COUNT(*) {esperados_mes:,} ≠ compactados {escritos_mes:,}")
+            entrada = particiones[mes]
+            nuevos = {f"{prefijo}/{os.path.relpath(r, directorio)}": r for r, _ in base.values()}
+            de_esta_ejecucion = {n for n, _ in subidos}
+            obsoletos.extend(
+                n for n in [entrada["base"], *entrada["deltas"]]
+                if n and n not in nuevos and n not in de_esta_ejecucion
+            )
+            subidos = [(n, r) for n, r in subidos if n not in entrada["deltas"]]
+            entrada.update(base=next(iter(nuevos), None), deltas=[])
+            subidos.extend(nuevos.items())
+
+        for nombre, ruta in subidos:
+            bytes_subidos += os.path.getsize(ruta)
+            _subir(client, namespace, bucket, nombre, ruta)
+
+    manifest.update({
+        "tabla": esquema.tabla,
+        "formato": "parquet",
+        "particion": {"columna": COLUMNA_PARTICION, "origen": "SUBSTR(CREATED, 1, 7)"},
+        "clave": "ID",
+        "version": "MODIFIED",
+        "lectura": "Por partición: base + deltas; quedarse con la fila de mayor MODIFIED por ID",
+        "generado": datetime.now(timezone.utc).isoformat(),
+        "particiones": dict(sorted(particiones.items())),
+    })
+    ruta_manifest = os.path.join(tempfile.gettempdir(), f"manifest-{esquema.tabla}-{time.time_ns()}.json")
+    try:
+        with open(ruta_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        _subir(client, namespace, bucket, f"{prefijo}/{MANIFEST}", ruta_manifest)
+    finally:
+        os.remove(ruta_manifest)
+
+    # Solo con el manifest publicado se borra lo que ya no referencia
+    _borrar(client, namespace, bucket, obsoletos)
+    guardar_watermark(engine, _clave_watermark(esquema), maximo)
+
+    return {
+        "modo": modo,
+        "registros": escritos,
+        "particiones": len(archivos),
+        "compactadas": len(compactadas),
+        "bytes": bytes_subidos,
+    }
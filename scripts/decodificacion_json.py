@@ -0,0 +1,131 @@
+# ============================================================================
+# 🧬 DECODIFICACIÓN VECTORIZADA DE COLUMNAS JSON (CLOB) A TIPOS ANIDADOS ARROW
+# ============================================================================
+# - Camino rápido: la columna entera se envuelve como NDJSON ({"v": <json>}
+#   por fila, con kernels de Arrow) y la parsea pyarrow.json en C++ con el
+#   tipo declarado en esquemas.py como explicit_schema; sin bucle por celda
+# - Las claves que faltan quedan a null; una clave no declarada cuenta como
+#   valor que no encaja (el struct no la puede guardar)
+# - Si algún valor no encaja en el tipo (número donde se declaró texto, objeto
+#   donde se declaró lista, clave de más...), ese lote pasa por el camino lento: orjson por
+#   celda y coerción recursiva al tipo declarado; el tipo de salida es siempre
+#   el declarado, así todos los lotes del Parquet comparten esquema
+# - Las celdas que no son JSON, o de las que la coerción tuvo que descartar
+#   algún valor, se devuelven aparte con su texto original para no perderlas
+# ============================================================================
+
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as pj
+
+BLOQUE_MINIMO = 16 * 1024 * 1024
+
+
+# --- CAMINO RÁPIDO ---
+
+def _como_ndjson(textos):
+    """Columna de texto JSON -> buffer NDJSON {"v": ...}, una línea por fila"""
+    limpios = pc.utf8_trim_whitespace(textos)
+    limpios = pc.if_else(pc.equal(limpios, ""), pa.scalar(None, pa.string()), limpios)
+    # Un salto de línea solo puede ser espacio entre tokens en un JSON válido
+    limpios = pc.replace_substring(pc.fill_null(limpios, "null"), "\n", " ")
+    lineas = pc.binary_join_element_wise('{"v":', limpios, "}\n", "")
+    if isinstance(lineas, pa.ChunkedArray):
+        lineas = lineas.combine_chunks()
+
+    # Los valores de un StringArray son contiguos: el buffer ya es el NDJSON
+    desplazamientos = pa.Array.from_buffers(
+        pa.int32(), len(lineas) + 1, [None, lineas.buffers()[1]], offset=lineas.offset
+    )
+    inicio, fin = desplazamientos[0].as_py(), desplazamientos[-1].as_py()
+    mayor = pc.max(pc.binary_length(lineas)).as_py()
+    return lineas.buffers()[2][inicio:fin], mayor
+
+
+def _parsear(textos, tipo):
+    buffer, mayor = _como_ndjson(textos)
+    tabla = pj.read_json(
+        pa.BufferReader(buffer),
+        read_options=pj.ReadOptions(block_size=max(BLOQUE_MINIMO, mayor + 1)),
+        parse_options=pj.ParseOptions(
+            explicit_schema=pa.schema([pa.field("v", tipo)]),
+            unexpected_field_behavior="error",       # Clave de más: al camino lento
+        ),
+    )
+    return tabla.column("v").combine_chunks()
+
+
+# --- CAMINO LENTO (COERCIÓN AL TIPO DECLARADO) ---
+
+def _coercer(valor, tipo, perdidas):
+    """
+    Valor Python decodificado -> valor que encaja en `tipo` (o None). Cada
+    valor no nulo que haya que descartar se anota en `perdidas`.
+    """
+    if valor is None:
+        return None
+    if pa.types.is_string(tipo) or pa.types.is_large_string(tipo):
+        if isinstance(valor, str):
+            return valor
+        if isinstance(valor, (list, dict, bool)):
+            return orjson.dumps(valor).decode("utf-8")
+        return str(valor)
+    if pa.types.is_list(tipo) or pa.types.is_large_list(tipo):
+        if isinstance(valor, list):
+            return [_coercer(v, tipo.value_type, perdidas) for v in valor]
+    elif pa.types.is_struct(tipo):
+        if isinstance(valor, dict):
+            declarados = {campo.name for campo in tipo}
+            perdidas.extend(clave for clave in valor if clave not in declarados)
+            return {campo.name: _coercer(valor.get(campo.name), campo.type, perdidas) for campo in tipo}
+    elif pa.types.is_boolean(tipo):
+        if isinstance(valor, bool):
+            return valor
+    elif pa.types.is_integer(tipo) or pa.types.is_floating(tipo):
+        if not isinstance(valor, (list, dict)):
+            try:
+                return int(valor) if pa.types.is_integer(tipo) else float(valor)
+            except (TypeError, ValueError):
+                pass
+    else:
+        return valor
+    perdidas.append(valor)
+    return None
+
+
+def _parsear_celda_a_celda(textos, tipo):
+    """(array del tipo declarado, texto original de las celdas con pérdidas o None por fila)"""
+    valores, originales = [], []
+    for texto in textos.to_pylist():
+        perdidas = []
+        try:
+            valor = None if texto is None else orjson.loads(texto)
+        except orjson.JSONDecodeError:
+            valor, perdidas = None, [texto]
+        valores.append(_coercer(valor, tipo, perdidas))
+        originales.append(texto if perdidas else None)
+    return pa.array(valores, type=tipo), originales
+
+
+# --- API ---
+
+def columna_json(textos, tipo):
+    """
+    Columna de texto JSON (pa.Array de strings) -> (array del `tipo` declarado,
+    originales). `originales` es None si todas las celdas encajan; si no, una
+    lista por fila con el texto de las celdas que no se pudieron representar.
+    Con tipo texto la columna se devuelve tal cual (JSON sin estructura declarada).
+    """
+    if pa.types.is_string(tipo):
+        return textos, None
+    if len(textos) == 0:
+        return pa.array([], type=tipo), None
+    try:
+        columna = _parsear(textos, tipo)
+        if len(columna) == len(textos):
+            return columna, None
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    columna, originales = _parsear_celda_a_celda(textos, tipo)
+    return columna, originales if any(o is not None for o in originales) else None
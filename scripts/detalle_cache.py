@@ -0,0 +1,140 @@
+# ============================================================================
+# 💾 CACHÉ LOCAL DE DETALLES CLIENTIFY (SQLITE, LRU POR TAMAÑO)
+# ============================================================================
+# - Clave: (recurso, id, modified) -> JSON crudo del detalle (comprimido)
+# - Reintentos tras un MERGE fallido, ventanas solapadas y backfills
+#   sirven desde disco los registros que no cambiaron
+# - Al superar el tamaño máximo se expulsan los menos usados recientemente
+# ============================================================================
+
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+RUTA_DEFECTO = os.path.join(".cache", "clientify_detalles.sqlite")
+MB_DEFECTO = 512
+
+
+class CacheDetalles:
+    """Caché en disco de detalles por (id, modified) con expulsión LRU por bytes"""
+
+    def __init__(self, ruta, recurso, max_bytes, commit_cada=200):
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        self.recurso = recurso
+        self.max_bytes = max_bytes
+        self.commit_cada = commit_cada
+        self.aciertos = 0
+        self.fallos = 0
+
+        self._conn = sqlite3.connect(ruta)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS detalles (
+                recurso TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                modified TEXT NOT NULL,
+                datos BLOB NOT NULL,
+                bytes INTEGER NOT NULL,
+                ultimo_uso REAL NOT NULL,
+                PRIMARY KEY (recurso, id, modified)
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_detalles_uso ON detalles (ultimo_uso)")
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM detalles"
+        ).fetchone()[0]
+        self._pendientes = 0
+
+    @classmethod
+    def desde_entorno(cls, recurso):
+        """Caché configurada por CACHE_DETALLES_RUTA / CACHE_DETALLES_MB, o None si MB=0"""
+        mb = int(os.environ.get("CACHE_DETALLES_MB", MB_DEFECTO))
+        if mb <= 0:
+            return None
+        ruta = os.environ.get("CACHE_DETALLES_RUTA", RUTA_DEFECTO)
+        return cls(ruta, recurso, mb * 1024 * 1024)
+
+    def obtener(self, item_id, modified):
+        """Detalle guardado para esa versión del registro, o None"""
+        if modified is None:
+            return None
+
+        fila = self._conn.execute(
+            "SELECT datos FROM detalles WHERE recurso = ? AND id = ? AND modified = ?",
+            (self.recurso, int(item_id), str(modified)),
+        ).fetchone()
+
+        if fila is None:
+            self.fallos += 1
+            return None
+
+        self._conn.execute(
+            "UPDATE detalles SET ultimo_uso = ? WHERE recurso = ? AND id = ? AND modified = ?",
+            (time.time(), self.recurso, int(item_id), str(modified)),
+        )
+        self._tocar()
+        self.aciertos += 1
+        return json.loads(zlib.decompress(fila[0]))
+
+    def guardar(self, item_id, modified, detalle):
+        """Guarda el detalle y descarta las versiones anteriores del mismo ID"""
+        if modified is None:
+            return
+
+        datos = zlib.compress(json.dumps(detalle, ensure_ascii=False).encode("utf-8"), 1)
+        anteriores = self._conn.execute(
+            "SELECT COALESCE(SUM(bytes), 0) FROM detalles WHERE recurso = ? AND id = ?",
+            (self.recurso, int(item_id)),
+        ).fetchone()[0]
+        self._conn.execute(
+            "DELETE FROM detalles WHERE recurso = ? AND id = ?",
+            (self.recurso, int(item_id)),
+        )
+        self._conn.execute(
+            "INSERT INTO detalles (recurso, id, modified, datos, bytes, ultimo_uso) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.recurso, int(item_id), str(modified), datos, len(datos), time.time()),
+        )
+        self._total_bytes += len(datos) - anteriores
+
+        if self._total_bytes > self.max_bytes:
+            self._expulsar()
+        self._tocar()
+
+    def _expulsar(self):
+        """Borra las entradas menos usadas hasta quedar en el 90% del máximo"""
+        objetivo = int(self.max_bytes * 0.9)
+        filas = self._conn.execute(
+            "SELECT recurso, id, modified, bytes FROM detalles ORDER BY ultimo_uso"
+        )
+        borrar = []
+        for recurso, item_id, modified, nbytes in filas:
+            if self._total_bytes <= objetivo:
+                break
+            borrar.append((recurso, item_id, modified))
+            self._total_bytes -= nbytes
+
+        self._conn.executemany(
+            "DELETE FROM detalles WHERE recurso = ? AND id = ? AND modified = ?", borrar
+        )
+
+    def _tocar(self):
+        self._pendientes += 1
+        if self._pendientes >= self.commit_cada:
+            self._conn.commit()
+            self._pendientes = 0
+
+    def cerrar(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def resumen(self):
+        return (
+            f"{self.aciertos} aciertos, {self.fallos} fallos, "
+            f"{self._total_bytes / (1024 * 1024):.1f} MB en disco"
+        )
@@ -0,0 +1,60 @@
+# ============================================================================
+# ⏭ DETALLE SELECTIVO: EVITAR GET /{id}/ CUANDO NO HACE FALTA
+# ============================================================================
+# - Sin cambios: el `modified` del listado coincide con el guardado en Oracle
+# - Listado suficiente: el item del listado ya trae todas las columnas del mapa
+# ============================================================================
+
+from sqlalchemy import text
+
+MODO_COMPLETO = "completo"      # Siempre pide el detalle (comportamiento original)
+MODO_SELECTIVO = "selectivo"    # Omite el detalle en los dos casos de arriba
+
+TAMANO_LOTE_IN = 1000           # Máximo de elementos en un IN (...) de Oracle
+
+
+def cargar_modificados(engine, table_name, ids):
+    """Devuelve {id: modified} de los IDs que ya existen en la tabla destino"""
+    ids = list(dict.fromkeys(ids))
+    modificados = {}
+
+    with engine.connect() as conn:
+        for inicio in range(0, len(ids), TAMANO_LOTE_IN):
+            lote = ids[inicio:inicio + TAMANO_LOTE_IN]
+            binds = ", ".join(f":id{i}" for i in range(len(lote)))
+            params = {f"id{i}": v for i, v in enumerate(lote)}
+            filas = conn.execute(
+                text(f'SELECT "ID", "MODIFIED" FROM "{table_name}" WHERE "ID" IN ({binds})'),
+                params,
+            )
+            for item_id, modified in filas:
+                modificados[int(item_id)] = modified
+
+    return modificados
+
+
+def listado_suficiente(item, columnas):
+    """True si el item del listado trae todas las columnas que se guardan"""
+    return all(col in item for col in columnas)
+
+
+def separar_items(lista_items, modificados, columnas):
+    """
+    Clasifica los items del listado.
+    Devuelve (pendientes, desde_listado, sin_cambios):
+      - pendientes: necesitan GET de detalle
+      - desde_listado: el propio item del listado se usa como detalle
+      - sin_cambios: ya están al día en Oracle, no se descargan ni se mergean
+    """
+    pendientes, desde_listado, sin_cambios = [], [], []
+
+    for item in lista_items:
+        guardado = modificados.get(int(item["id"]))
+        if guardado is not None and item.get("modified") is not None and str(item["modified"]) == guardado:
+            sin_cambios.append(item)
+        elif listado_suficiente(item, columnas):
+            desde_listado.append(item)
+        else:
+            pendientes.append(item)
+
+    return pendientes, desde_listado, sin_cambios
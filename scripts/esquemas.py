@@ -0,0 +1,211 @@
+# ============================================================================
+# 📐 REGISTRO DE ESQUEMAS: OPORTUNIDADES (DEALS) Y ACTIVIDADES (TASKS)
+# ============================================================================
+# - Una línea por columna: campo de la API, tipo Oracle, tipo Arrow y si el
+#   valor es JSON anidado (se guarda como CLOB y se decodifica al exportar)
+# - Las columnas JSON de estructura conocida declaran su tipo Arrow anidado
+#   (lista/struct) de forma explícita: el esquema del Parquet no depende de
+#   los datos del lote. Las de contenido heterogéneo (productos, muro,
+#   duración por etapa) se exportan como el texto JSON guardado, íntegro
+# - Las celdas que no son JSON o no encajan en el tipo declarado (claves no
+#   declaradas incluidas) se guardan tal cual en JSON_ORIGINAL
+#   ({"COLUMNA": "texto"}): nada de lo que hay en Oracle se queda fuera
+# - De aquí salen el conversor de detalles, el DDL, los binds de carga y el
+#   esquema del Parquet; ningún script vuelve a deducir tipos en ejecución
+# - Añadir una columna = añadir una línea en OPORTUNIDADES / ACTIVIDADES
+# ============================================================================
+
+from dataclasses import dataclass, field
+
+import pyarrow as pa
+from sqlalchemy.dialects import oracle
+from sqlalchemy.types import CLOB, Integer, Numeric, String
+
+DIALECTO = oracle.dialect()
+
+
+@dataclass(frozen=True)
+class Columna:
+    """Una columna: campo en la API (minúsculas) → columna Oracle en mayúsculas"""
+    campo: str
+    tipo_oracle: object
+    tipo_arrow: object              # En JSON: tipo anidado declarado (o texto)
+    convertir: object = field(repr=False)
+    es_json: bool = False
+
+    @property
+    def nombre(self):
+        return self.campo.upper()
+
+
+def _conversor(nombre, **opciones):
+    """Conversor de normalizacion.py resuelto al primer uso (pandas solo se carga si hay filas)"""
+    def convertir(valores):
+        import normalizacion
+        return getattr(normalizacion, nombre)(valores, **opciones)
+    return convertir
+
+
+def entero(campo):
+    return Columna(campo, Integer(), pa.int64(), _conversor("columna_numerica", entera=True))
+
+
+def decimal(campo, precision, escala):
+    return Columna(campo, Numeric(precision, escala), pa.float64(), _conversor("columna_numerica"))
+
+
+def texto(campo, largo):
+    return Columna(campo, String(largo), pa.string(), _conversor("columna_texto"))
+
+
+def anidado(campo, tipo_arrow=pa.string()):
+    return Columna(campo, CLOB(), tipo_arrow, _conversor("columna_texto"), es_json=True)
+
+
+# Estructuras JSON conocidas de la API
+LISTA_TEXTO = pa.list_(pa.string())
+REFERENCIAS = pa.list_(pa.struct([           # Objetos relacionados (contactos, empresas, deals...)
+    pa.field("id", pa.int64()),
+    pa.field("name", pa.string()),
+    pa.field("url", pa.string()),
+]))
+CAMPOS_PERSONALIZADOS = pa.list_(pa.struct([
+    pa.field("field", pa.string()),
+    pa.field("value", pa.string()),
+]))
+
+# Texto original de las celdas JSON que no se pudieron decodificar al tipo declarado
+COLUMNA_JSON_ORIGINAL = "JSON_ORIGINAL"
+
+
+class Esquema:
+    """Columnas de una tabla destino con sus derivados precalculados"""
+
+    def __init__(self, tabla, columnas):
+        self.tabla = tabla
+        self.columnas = tuple(columnas)
+        self.campos = [c.campo for c in self.columnas]
+        self.nombres = [c.nombre for c in self.columnas]
+        self.columnas_json = [c.nombre for c in self.columnas if c.es_json]
+        self.por_nombre = {c.nombre: c for c in self.columnas}
+
+    def ampliado(self, *extra):
+        """Mismo esquema con columnas adicionales al final"""
+        return Esquema(self.tabla, self.columnas + extra)
+
+    def ddl(self, tabla=None, temporal=False):
+        """CREATE TABLE (o GLOBAL TEMPORARY ... ON COMMIT DELETE ROWS)"""
+        columnas = ", ".join(
+            f'"{c.nombre}" {c.tipo_oracle.compile(dialect=DIALECTO)}' for c in self.columnas
+        )
+        if temporal:
+            return f'CREATE GLOBAL TEMPORARY TABLE "{tabla or self.tabla}" ({columnas}) ON COMMIT DELETE ROWS'
+        return f'CREATE TABLE "{tabla or self.tabla}" ({columnas})'
+
+    def esquema_arrow(self):
+        """Esquema Arrow/Parquet de la exportación (con JSON_ORIGINAL si hay columnas JSON)"""
+        campos = [pa.field(c.nombre, c.tipo_arrow) for c in self.columnas]
+        if self.columnas_json:
+            campos.append(pa.field(COLUMNA_JSON_ORIGINAL, pa.string()))
+        return pa.schema(campos)
+
+    def select(self):
+        """SELECT de las columnas del esquema (las INVISIBLE quedan fuera)"""
+        columnas = ", ".join(f'"{n}"' for n in self.nombres)
+        return f'SELECT {columnas} FROM "{self.tabla}"'
+
+
+# ============================================================================
+# OPORTUNIDADES
+# ============================================================================
+
+OPORTUNIDADES = Esquema("OPORTUNIDADES_REAL", [
+    entero("id"),
+    entero("probability"),
+    entero("status"),
+    entero("who_can_view"),
+    decimal("amount", 15, 2),
+    texto("created", 64),
+    texto("modified", 64),
+    texto("expected_closed_date", 64),
+    texto("actual_closed_date", 64),
+    texto("currency", 50),
+    texto("contact", 255),
+    texto("contact_name", 255),
+    texto("contact_email", 255),
+    texto("contact_phone", 255),
+    texto("contact_source", 255),
+    texto("contact_medium", 255),
+    texto("owner", 255),
+    texto("owner_name", 255),
+    texto("owner_picture", 500),
+    texto("company", 255),
+    texto("name", 500),
+    texto("source", 255),
+    texto("deal_source", 255),
+    texto("lost_reason", 500),
+    texto("remarks", 4000),
+    texto("url", 500),
+    texto("pipeline", 255),
+    texto("pipeline_desc", 255),
+    texto("pipeline_stage", 255),
+    texto("pipeline_stage_desc", 255),
+    texto("status_desc", 255),
+    texto("probability_desc", 50),
+    texto("amount_user", 255),
+    anidado("custom_fields", CAMPOS_PERSONALIZADOS),
+    anidado("tags", LISTA_TEXTO),
+    anidado("products"),
+    anidado("events", REFERENCIAS),
+    anidado("tasks", REFERENCIAS),
+    anidado("integrations", REFERENCIAS),
+    anidado("involved_companies", REFERENCIAS),
+    anidado("involved_contacts", REFERENCIAS),
+    anidado("stages_duration"),
+    anidado("wall_entries"),
+])
+
+# ============================================================================
+# ACTIVIDADES
+# ============================================================================
+
+ACTIVIDADES = Esquema("ACTIVIDADES_TOTALES", [
+    entero("id"),
+    entero("duration"),
+    entero("status"),
+    entero("type"),
+    entero("owner_id"),
+    entero("assigned_to_id"),
+    texto("name", 500),
+    texto("description", 4000),
+    texto("remarks", 4000),
+    texto("url", 500),
+    texto("location", 500),
+    texto("additional_option", 255),
+    texto("created", 64),
+    texto("modified", 64),
+    texto("due_date", 64),
+    texto("start_datetime", 64),
+    texto("end_datetime", 64),
+    texto("completed_date", 64),
+    texto("owner", 255),
+    texto("owner_name", 255),
+    texto("assigned_to", 255),
+    texto("assigned_to_name", 255),
+    texto("status_desc", 255),
+    texto("type_desc", 255),
+    texto("task_type", 255),
+    texto("task_stage", 255),
+    anidado("deals", REFERENCIAS),
+    anidado("tags", LISTA_TEXTO),
+    anidado("guest_users", REFERENCIAS),
+    anidado("related_companies", LISTA_TEXTO),
+    anidado("related_companies_data", REFERENCIAS),
+    anidado("related_companies_names", LISTA_TEXTO),
+    anidado("related_contacts", LISTA_TEXTO),
+    anidado("related_contacts_data", REFERENCIAS),
+    anidado("related_contacts_names", LISTA_TEXTO),
+    anidado("related_deals_data", REFERENCIAS),
+])
+
+ESQUEMAS = {"deals": OPORTUNIDADES, "tasks": ACTIVIDADES}
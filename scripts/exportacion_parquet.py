@@ -0,0 +1,149 @@
+# ============================================================================
+# 📦 EXPORTACIÓN ORACLE → PARQUET EN STREAMING
+# ============================================================================
+# - fetchmany con arraysize grande: nunca hay más de un lote en memoria
+# - COUNT(*) y SELECT en la misma transacción READ ONLY (misma foto de datos),
+#   así el control de registros no falla si una sincronización está en curso
+# - Las columnas JSON se decodifican por columna entera al tipo anidado que
+#   declara esquemas.py (decodificacion_json.py): el esquema del Parquet es
+#   fijo y cada lote se escribe directamente como row group
+# - Huella de la tabla (COUNT, MAX(MODIFIED), suma de ROW_HASH) antes de
+#   exportar: si coincide con la del objeto ya subido no hay nada que hacer
+# ============================================================================
+
+import hashlib
+import os
+from contextlib import contextmanager
+
+import oracledb
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy.exc import DatabaseError
+
+from carga_oracle import COLUMNA_HASH
+from decodificacion_json import columna_json
+from metricas import METRICAS
+
+FILAS_POR_LOTE = int(os.environ.get("EXPORT_FILAS_LOTE", 50000))
+ARRAYSIZE = 10000
+
+
+# --- CONVERSIÓN A ARROW SEGÚN EL ESQUEMA ---
+
+def tabla_arrow(filas, esquema):
+    """Filas leídas de Oracle -> tabla Arrow con los tipos declarados del esquema"""
+    columnas = zip(*filas) if filas else [() for _ in esquema.columnas]
+    arrays, originales = [], {}
+    for col, valores in zip(esquema.columnas, columnas):
+        if col.es_json:
+            columna, textos = columna_json(pa.array(valores, type=pa.string()), col.tipo_arrow)
+            arrays.append(columna)
+            if textos is not None:
+                originales[col.nombre] = textos
+        else:
+            arrays.append(pa.array(valores, type=col.tipo_arrow))
+    if esquema.columnas_json:
+        arrays.append(_json_original(originales, len(filas)))
+    return pa.Table.from_arrays(arrays, schema=esquema.esquema_arrow())
+
+
+def _json_original(originales, n):
+    """JSON_ORIGINAL por fila: {"COLUMNA": "texto"} de las celdas que no encajaron, o null"""
+    if not originales:
+        return pa.nulls(n, pa.string())
+    METRICAS.sumar("celdas_json_originales", sum(o is not None for t in originales.values() for o in t))
+    filas = []
+    for i in range(n):
+        celdas = {nombre: textos[i] for nombre, textos in originales.items() if textos[i] is not None}
+        filas.append(orjson.dumps(celdas).decode("utf-8") if celdas else None)
+    return pa.array(filas, type=pa.string())
+
+
+# --- HUELLA DEL CONTENIDO ---
+
+def huella_tabla(engine, esquema):
+    """
+    Huella del contenido exportable de la tabla: cambia si hay filas nuevas o
+    borradas, si sube MODIFIED o si cambia el ROW_HASH de alguna fila (aunque
+    MODIFIED no se mueva). Incluye el esquema Arrow: cambiar columnas o tipos
+    obliga a volver a subir.
+    """
+    tabla = f'"{esquema.tabla}"'
+    with METRICAS.fase("huella"), engine.connect() as conn:
+        try:
+            fila = conn.exec_driver_sql(
+                f'SELECT COUNT(*), MAX("MODIFIED"), SUM(ORA_HASH("{COLUMNA_HASH}")) FROM {tabla}'
+            ).one()
+        except DatabaseError:
+            # Tabla aún sin ROW_HASH (nunca cargada con carga_oracle)
+            fila = conn.exec_driver_sql(f'SELECT COUNT(*), MAX("MODIFIED"), NULL FROM {tabla}').one()
+
+    contenido = "|".join([str(esquema.esquema_arrow()), *(str(v) for v in fila)])
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+# --- LECTURA POR LOTES ---
+
+def _clob_como_texto(cursor, metadata):
+    """CLOB -> str directamente en el fetch (sin un round trip por LOB)"""
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+
+def leer_lotes(conn, esquema, filas_por_lote=FILAS_POR_LOTE, where=None, params=None):
+    """Tablas Arrow de como mucho `filas_por_lote` filas con las columnas del esquema"""
+    cursor = conn.connection.cursor()
+    cursor.arraysize = ARRAYSIZE
+    cursor.prefetchrows = ARRAYSIZE
+    cursor.outputtypehandler = _clob_como_texto
+    try:
+        cursor.execute(esquema.select() + (f" WHERE {where}" if where else ""), params or {})
+        while True:
+            with METRICAS.fase("lectura"):
+                filas = cursor.fetchmany(filas_por_lote)
+            if not filas:
+                return
+            with METRICAS.fase("conversion"):
+                lote = tabla_arrow(filas, esquema)
+                METRICAS.sumar("filas", len(filas))
+            yield lote
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def lotes_arrow(engine, esquema, filas_por_lote=FILAS_POR_LOTE, where=None, params=None):
+    """
+    (registros_esperados, iterador de lotes Arrow) dentro de una transacción
+    READ ONLY: el COUNT(*) y el SELECT ven la misma foto de datos.
+    """
+    filtro = f" WHERE {where}" if where else ""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+        esperados = conn.exec_driver_sql(
+            f'SELECT COUNT(*) FROM "{esquema.tabla}"{filtro}', params or {}
+        ).scalar()
+        try:
+            yield esperados, leer_lotes(conn, esquema, filas_por_lote, where, params)
+        finally:
+            conn.rollback()
+
+
+def exportar_tabla(engine, esquema, ruta, filas_por_lote=FILAS_POR_LOTE, al_leer_lote=None):
+    """
+    Escribe la tabla del esquema en `ruta` (Parquet) con memoria acotada al lote.
+    Devuelve (registros_esperados, registros_escritos).
+    """
+    escritos = 0
+    with lotes_arrow(engine, esquema, filas_por_lote) as (esperados, lotes), \
+            pq.ParquetWriter(ruta, esquema.esquema_arrow()) as writer:
+        for lote in lotes:
+            with METRICAS.fase("escritura"):
+                writer.write_table(lote)
+                METRICAS.sumar("filas", lote.num_rows)
+            escritos += lote.num_rows
+            if al_leer_lote:
+                al_leer_lote(lote.num_rows)
+
+    return esperados, escritos
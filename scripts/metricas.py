@@ -0,0 +1,132 @@
+# ============================================================================
+# 📈 MÉTRICAS POR FASE: TIEMPOS Y CONTADORES LEGIBLES POR MÁQUINA
+# ============================================================================
+# - `with METRICAS.fase("merge"):` mide la fase (tiempo acumulado, veces y RSS
+#   máximo del proceso al cerrarla); las fases anidadas se nombran con "/"
+#   ("detalles/merge") y sus tiempos también cuentan en la fase padre
+# - `METRICAS.sumar("http_429")` suma a la fase en curso: la fase viaja en un
+#   contextvar, así que la heredan las tareas asyncio y asyncio.to_thread
+# - Al final de cada ejecución, METRICAS.escribir():
+#     METRICAS_JSONL=<ruta>      una línea JSON por fase (se añade al fichero)
+#     METRICAS_PROM_DIR=<dir>    <dir>/<proceso>.prom para el textfile
+#                                collector de node_exporter (escritura atómica)
+# ============================================================================
+
+import contextvars
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIJO_PROMETHEUS = "oikos"
+
+_fase_actual = contextvars.ContextVar("fase_actual", default=None)
+
+
+def rss_max_mb():
+    """RSS máximo del proceso hasta ahora (ru_maxrss: KB en Linux, bytes en macOS)"""
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maximo / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Metricas:
+    """Acumulador de fases y contadores de un proceso"""
+
+    def __init__(self, proceso="oikos"):
+        self.proceso = proceso
+        self.inicio = time.time()
+        self._fases = {}
+        self._lock = threading.Lock()
+
+    def _entrada(self, nombre):
+        return self._fases.setdefault(nombre, {"segundos": 0.0, "veces": 0, "rss_max_mb": 0.0, "contadores": {}})
+
+    @contextmanager
+    def fase(self, nombre):
+        padre = _fase_actual.get()
+        ruta = f"{padre}/{nombre}" if padre else nombre
+        token = _fase_actual.set(ruta)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            _fase_actual.reset(token)
+            with self._lock:
+                entrada = self._entrada(ruta)
+                entrada["segundos"] += duracion
+                entrada["veces"] += 1
+                entrada["rss_max_mb"] = rss_max_mb()
+
+    def sumar(self, contador, valor=1):
+        """Suma `valor` al contador en la fase en curso (o en 'general')"""
+        with self._lock:
+            contadores = self._entrada(_fase_actual.get() or "general")["contadores"]
+            contadores[contador] = contadores.get(contador, 0) + valor
+
+    def resumen(self):
+        """Filas por fase (dicts planos), más una fila 'total'"""
+        filas = []
+        with self._lock:
+            for nombre, entrada in self._fases.items():
+                fila = {"fase": nombre, "segundos": round(entrada["segundos"], 3), "veces": entrada["veces"],
+                        "rss_max_mb": entrada["rss_max_mb"], **entrada["contadores"]}
+                if "filas" in fila and entrada["segundos"] > 0:
+                    fila["filas_s"] = round(fila["filas"] / entrada["segundos"], 1)
+                filas.append(fila)
+        filas.append({"fase": "total", "segundos": round(time.time() - self.inicio, 3), "rss_max_mb": rss_max_mb()})
+        return filas
+
+    # --- SALIDA ---
+
+    def _escribir_jsonl(self, ruta, filas):
+        marca = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        with open(ruta, "a", encoding="utf-8") as f:
+            for fila in filas:
+                f.write(json.dumps({"ts": marca, "proceso": self.proceso, **fila}, ensure_ascii=False) + "\n")
+
+    def _escribir_prometheus(self, directorio, filas):
+        p = PREFIJO_PROMETHEUS
+        lineas = [
+            f"# HELP {p}_fase_segundos Tiempo acumulado en la fase",
+            f"# TYPE {p}_fase_segundos gauge",
+            f"# HELP {p}_fase_contador Contadores de la fase (requests, reintentos, filas, bytes...)",
+            f"# TYPE {p}_fase_contador gauge",
+            f"# HELP {p}_rss_max_mb RSS máximo del proceso al cerrar la fase",
+            f"# TYPE {p}_rss_max_mb gauge",
+        ]
+        for fila in filas:
+            etiquetas = f'proceso="{self.proceso}",fase="{fila["fase"]}"'
+            lineas.append(f"{p}_fase_segundos{{{etiquetas}}} {fila['segundos']}")
+            lineas.append(f"{p}_rss_max_mb{{{etiquetas}}} {fila['rss_max_mb']}")
+            for clave, valor in fila.items():
+                if clave not in ("fase", "segundos", "rss_max_mb"):
+                    lineas.append(f'{p}_fase_contador{{{etiquetas},contador="{clave}"}} {valor}')
+        lineas.append(f'{p}_ultima_ejecucion_timestamp{{proceso="{self.proceso}"}} {int(time.time())}')
+
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"{self.proceso}.prom")
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas) + "\n")
+        os.replace(temporal, ruta)
+
+    def escribir(self):
+        """Vuelca el resumen a los destinos configurados; nunca tumba la ejecución"""
+        filas = self.resumen()
+        destinos = {"METRICAS_JSONL": self._escribir_jsonl, "METRICAS_PROM_DIR": self._escribir_prometheus}
+        for variable, escribir in destinos.items():
+            destino = os.environ.get(variable)
+            if not destino:
+                continue
+            try:
+                escribir(destino, filas)
+            except OSError as e:
+                print(f"⚠️ No se pudieron escribir las métricas en {destino}: {e}")
+        return filas
+
+
+METRICAS = Metricas()
@@ -0,0 +1,210 @@
+# ============================================================================
+# 🧪 SERVIDOR LOCAL QUE IMITA LA API DE CLIENTIFY (/v1/deals/ Y /v1/tasks/)
+# ============================================================================
+# - Registros sintéticos generados a partir de esquemas.py (todas las columnas,
+#   JSON anidados incluidos), deterministas por semilla
+# - Listado paginado estilo DRF (count/next/previous/results, 404 fuera de
+#   rango) con filtro modified[gte]; detalle en /v1/<recurso>/<id>/
+# - Inyección de fallos: latencia con jitter, 429 con Retry-After, 5xx y
+#   cuelgues (la respuesta tarda --cuelgue-s en llegar)
+# - GET /__estadisticas: contadores por recurso y tipo de respuesta
+#
+# Uso:  python mock_clientify.py --registros 5000 --latencia-ms 40 --prob-429 0.01
+# ============================================================================
+
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+from aiohttp import web
+
+from esquemas import CAMPOS_PERSONALIZADOS, ESQUEMAS, LISTA_TEXTO
+from watermark import parsear_fecha
+
+CAMPOS_LISTADO = ("id", "name", "created", "modified", "owner", "status")
+PALABRAS = ("alfa", "beta", "gamma", "delta", "oikos", "cliente", "reunión", "oferta", "piso", "visita")
+
+
+@dataclass
+class ConfigMock:
+    registros: int = 2000
+    tamano_pagina: int = 50
+    latencia_ms: float = 30.0
+    jitter_ms: float = 20.0
+    prob_429: float = 0.0
+    prob_5xx: float = 0.0
+    prob_cuelgue: float = 0.0
+    cuelgue_s: float = 60.0
+    dias: int = 30
+    listado_completo: bool = False
+    semilla: int = 1
+
+
+# --- DATOS SINTÉTICOS ---
+
+def _texto(rnd, largo):
+    palabras = " ".join(rnd.choice(PALABRAS) for _ in range(rnd.randint(1, 6)))
+    return palabras[:largo]
+
+
+def _valor(rnd, columna, fecha):
+    if columna.campo in ("created", "modified") or "date" in columna.campo:
+        return fecha.isoformat()
+    if columna.es_json:
+        if columna.tipo_arrow == LISTA_TEXTO:
+            return [_texto(rnd, 30) for _ in range(rnd.randint(0, 4))]
+        if columna.tipo_arrow == CAMPOS_PERSONALIZADOS:
+            return [{"field": f"campo_{i}", "value": _texto(rnd, 40)} for i in range(rnd.randint(0, 8))]
+        return [
+            {"id": rnd.randint(1, 10**6), "name": _texto(rnd, 40), "url": f"https://api.clientify.net/v1/x/{i}/"}
+            for i in range(rnd.randint(0, 5))
+        ]
+    if columna.campo == "amount":
+        return f"{rnd.uniform(0, 500000):.2f}"
+    if pa.types.is_integer(columna.tipo_arrow):
+        return rnd.randint(0, 100)
+    if "url" in columna.campo or "picture" in columna.campo:
+        return f"https://clientify.net/{_texto(rnd, 20).replace(' ', '-')}"
+    return _texto(rnd, 255)
+
+
+def generar_registros(esquema, n, dias, semilla):
+    """{id: detalle} con `modified` repartido en los últimos `dias` días"""
+    rnd = random.Random(semilla)
+    ahora = datetime.now(timezone.utc).replace(microsecond=0)
+    registros = {}
+    for item_id in range(1, n + 1):
+        fecha = ahora - timedelta(seconds=rnd.randint(0, dias * 86400))
+        detalle = {c.campo: _valor(rnd, c, fecha) for c in esquema.columnas}
+        detalle["id"] = item_id
+        registros[item_id] = detalle
+    return registros
+
+
+# --- SERVIDOR ---
+
+class MockClientify:
+    """Estado del servidor: registros por recurso, configuración y contadores"""
+
+    def __init__(self, config):
+        self.config = config
+        self.rnd = random.Random(config.semilla)
+        self.registros = {
+            recurso: generar_registros(esquema, config.registros, config.dias, config.semilla + i)
+            for i, (recurso, esquema) in enumerate(ESQUEMAS.items())
+        }
+        self.fechas = {
+            recurso: {item_id: parsear_fecha(d["modified"]) for item_id, d in registros.items()}
+            for recurso, registros in self.registros.items()
+        }
+        self._filtrados = {}        # (recurso, modified[gte]) -> lista ordenada por id
+        self.estadisticas = {}
+
+    def _contar(self, recurso, tipo):
+        clave = f"{recurso}.{tipo}"
+        self.estadisticas[clave] = self.estadisticas.get(clave, 0) + 1
+
+    async def _fallo_inyectado(self, recurso):
+        """Latencia + (quizá) un fallo; devuelve la respuesta de error o None"""
+        c = self.config
+        await asyncio.sleep(max(0.0, c.latencia_ms + self.rnd.uniform(-c.jitter_ms, c.jitter_ms)) / 1000)
+        sorteo = self.rnd.random()
+        if sorteo < c.prob_cuelgue:
+            self._contar(recurso, "cuelgue")
+            await asyncio.sleep(c.cuelgue_s)
+        elif sorteo < c.prob_cuelgue + c.prob_429:
+            self._contar(recurso, "429")
+            return web.json_response({"detail": "Request was throttled."}, status=429, headers={"Retry-After": "1"})
+        elif sorteo < c.prob_cuelgue + c.prob_429 + c.prob_5xx:
+            self._contar(recurso, "5xx")
+            return web.json_response({"detail": "Server error"}, status=self.rnd.choice((500, 502, 503)))
+        return None
+
+    async def listado(self, request):
+        recurso = request.match_info["recurso"]
+        if recurso not in self.registros or "Authorization" not in request.headers:
+            return web.json_response({"detail": "Not found."}, status=404 if recurso not in self.registros else 401)
+        error = await self._fallo_inyectado(recurso)
+        if error:
+            return error
+
+        items = self._filtrar(recurso, request.query.get("modified[gte]"))
+        tamano = int(request.query.get("page_size", self.config.tamano_pagina))
+        pagina = int(request.query.get("page", 1))
+        inicio = (pagina - 1) * tamano
+        if pagina < 1 or (inicio >= len(items) and pagina != 1):
+            self._contar(recurso, "404")
+            return web.json_response({"detail": "Invalid page."}, status=404)
+
+        self._contar(recurso, "listado")
+        campos = None if self.config.listado_completo else CAMPOS_LISTADO
+        resultados = [
+            d if campos is None else {k: d[k] for k in campos if k in d}
+            for d in items[inicio:inicio + tamano]
+        ]
+        base = str(request.url.with_query(None))
+        return web.json_response({
+            "count": len(items),
+            "next": f"{base}?page={pagina + 1}" if inicio + tamano < len(items) else None,
+            "previous": f"{base}?page={pagina - 1}" if pagina > 1 else None,
+            "results": resultados,
+        })
+
+    def _filtrar(self, recurso, modified_gte):
+        clave = (recurso, modified_gte)
+        if clave not in self._filtrados:
+            desde = parsear_fecha(modified_gte)
+            fechas = self.fechas[recurso]
+            self._filtrados[clave] = [
+                d for item_id, d in self.registros[recurso].items()
+                if desde is None or fechas[item_id] >= desde
+            ]
+        return self._filtrados[clave]
+
+    async def detalle(self, request):
+        recurso = request.match_info["recurso"]
+        error = await self._fallo_inyectado(recurso)
+        if error:
+            return error
+        detalle = self.registros.get(recurso, {}).get(int(request.match_info["id"]))
+        if detalle is None:
+            self._contar(recurso, "404")
+            return web.json_response({"detail": "Not found."}, status=404)
+        self._contar(recurso, "detalle")
+        return web.json_response(detalle)
+
+    async def ver_estadisticas(self, request):
+        return web.json_response(self.estadisticas)
+
+
+def crear_app(config=None):
+    mock = MockClientify(config or ConfigMock())
+    app = web.Application()
+    app.router.add_get("/__estadisticas", mock.ver_estadisticas)
+    app.router.add_get("/v1/{recurso}/", mock.listado)
+    app.router.add_get(r"/v1/{recurso}/{id:\d+}/", mock.detalle)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API de Clientify simulada para pruebas y benchmarks")
+    parser.add_argument("--puerto", type=int, default=8765)
+    defecto = ConfigMock()
+    for nombre, valor in vars(defecto).items():
+        opcion = "--" + nombre.replace("_", "-")
+        if isinstance(valor, bool):
+            parser.add_argument(opcion, action="store_true")
+        else:
+            parser.add_argument(opcion, type=type(valor), default=valor)
+    args = parser.parse_args()
+
+    config = ConfigMock(**{k: getattr(args, k) for k in vars(defecto)})
+    print(f"🧪 Mock Clientify en http://127.0.0.1:{args.puerto}/v1/ ({config.registros} registros por recurso)")
+    web.run_app(crear_app(config), host="127.0.0.1", port=args.puerto, print=None)
+
+
+if __name__ == "__main__":
+    main()
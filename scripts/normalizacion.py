@@ -0,0 +1,71 @@
+# ============================================================================
+# 🧮 NORMALIZACIÓN COLUMNAR: DETALLES (DICTS) → DATAFRAME TIPADO
+# ============================================================================
+# - Una pasada por columna sobre la lista de dicts, sin df.apply por celda;
+#   el conversor de cada columna viene fijado por el registro (esquemas.py)
+# - Texto/CLOB: str tal cual, anidados (list/dict) serializados con orjson,
+#   resto de escalares con str(); columnas respaldadas por Arrow (string[pyarrow])
+# - Numéricas: conversión directa a float64 con numpy (None → NaN) y a Int64
+#   nullable en las enteras; solo si hay basura se cae a pd.to_numeric
+# ============================================================================
+
+import math
+
+import numpy as np
+import orjson
+import pandas as pd
+import pyarrow as pa
+
+OPCIONES_JSON = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _a_texto(valor):
+    """Valor de la API a texto para columnas String/CLOB (None si vacío)"""
+    if valor is None:
+        return None
+    if isinstance(valor, (list, dict, np.ndarray)):
+        try:
+            return orjson.dumps(valor, option=OPCIONES_JSON).decode("utf-8")
+        except (orjson.JSONEncodeError, TypeError):
+            return "[]"
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    return str(valor)
+
+
+def columna_texto(valores):
+    """Lista de valores crudos → columna de texto respaldada por Arrow"""
+    textos = [v if v is None or type(v) is str else _a_texto(v) for v in valores]
+    return pd.arrays.ArrowStringArray(pa.array(textos, type=pa.string()))
+
+
+def columna_numerica(valores, entera=False):
+    """Lista de valores crudos → float64 (o Int64 nullable si `entera`)"""
+    try:
+        numeros = np.array(valores, dtype="float64")
+    except (TypeError, ValueError):
+        numeros = pd.to_numeric(pd.Series(valores, dtype=object), errors="coerce").to_numpy("float64")
+
+    if entera:
+        validos = ~np.isnan(numeros)
+        if np.array_equal(numeros[validos], np.trunc(numeros[validos])):
+            return pd.arrays.IntegerArray(np.where(validos, numeros, 0).astype("int64"), mask=~validos)
+    return numeros
+
+
+def normalizar(lista_datos, esquema):
+    """
+    DataFrame con exactamente las columnas del esquema (en mayúsculas y
+    tipadas), sin IDs duplicados (se queda la última aparición).
+    """
+    if not lista_datos:
+        return pd.DataFrame()
+
+    # Traspuesta en una pasada: map(d.get, ...) va en C, sin bucle por celda
+    valores_por_columna = zip(*[list(map(d.get, esquema.campos)) for d in lista_datos])
+
+    df = pd.DataFrame({
+        columna.nombre: columna.convertir(valores)
+        for columna, valores in zip(esquema.columnas, valores_por_columna)
+    })
+    return df.drop_duplicates(subset=["ID"], keep="last").reset_index(drop=True)
@@ -0,0 +1,227 @@
+# ============================================================================
+# 🧪 OBJECT STORAGE LOCAL (SUSTITUTO DEL CLIENTE OCI PARA PRUEBAS)
+# ============================================================================
+# - Misma firma que oci.object_storage.ObjectStorageClient en las llamadas que
+#   usan los scripts (put/get/head/delete y multipart); guarda en un directorio
+# - Calcula Content-MD5 y opc-multipart-md5 como OCI, así la verificación de
+#   integridad de subida_oci.py se ejercita igual que contra el servicio
+# - Metadatos opc-meta-* en `raiz/.metadatos/<bucket>/<objeto>.json`
+# - Versionado: cada escritura deja una copia en `raiz/.versiones/...`;
+#   list_object_versions pagina de `limite_pagina` en `limite_pagina`
+# - `fallos_partes={n: veces}` hace fallar la parte n con 503 esas veces
+# - Se activa en parquet_to_oci.py con OCI_LOCAL_DIR=<directorio>
+# ============================================================================
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from oci.exceptions import ServiceError
+
+
+def _md5_b64(datos):
+    return base64.b64encode(hashlib.md5(datos).digest()).decode("ascii")
+
+
+def _leer_cuerpo(cuerpo):
+    if hasattr(cuerpo, "read"):
+        return cuerpo.read()
+    if isinstance(cuerpo, str):
+        return cuerpo.encode("utf-8")
+    return bytes(cuerpo)
+
+
+class Respuesta(SimpleNamespace):
+    """Lo que usan los scripts de oci.response.Response: status, headers, data"""
+
+
+class ObjectStorageLocal:
+    """Bucket(s) en `raiz/<bucket>/<objeto>`; multipart en `raiz/.multipart/<id>`"""
+
+    def __init__(self, raiz, fallos_partes=None, limite_pagina=1000):
+        self.raiz = raiz
+        self.limite_pagina = limite_pagina
+        self.fallos_partes = dict(fallos_partes or {})
+        self.llamadas = []
+        self._lock = threading.Lock()
+        os.makedirs(raiz, exist_ok=True)
+
+    def _ruta(self, bucket_name, object_name):
+        return os.path.join(self.raiz, bucket_name, *object_name.split("/"))
+
+    def _ruta_metadatos(self, bucket_name, object_name):
+        return os.path.join(self.raiz, ".metadatos", bucket_name, *object_name.split("/")) + ".json"
+
+    def _directorio_versiones(self, bucket_name, object_name):
+        return os.path.join(self.raiz, ".versiones", bucket_name, *object_name.split("/"))
+
+    def _guardar(self, bucket_name, object_name, datos, metadatos):
+        """Escribe el objeto actual y su copia versionada; devuelve el version_id"""
+        version_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        for ruta in (self._ruta(bucket_name, object_name),
+                     os.path.join(self._directorio_versiones(bucket_name, object_name), version_id)):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(ruta, "wb") as f:
+                f.write(datos)
+        ruta_meta = self._ruta_metadatos(bucket_name, object_name)
+        os.makedirs(os.path.dirname(ruta_meta), exist_ok=True)
+        with open(ruta_meta, "w", encoding="utf-8") as f:
+            json.dump(metadatos or {}, f)
+        return version_id
+
+    def _registrar(self, operacion, *args):
+        with self._lock:
+            self.llamadas.append((operacion, *args))
+
+    @staticmethod
+    def _no_existe(object_name):
+        return ServiceError(404, "ObjectNotFound", {}, f"{object_name} no existe")
+
+    # --- OBJETOS ---
+
+    def put_object(self, namespace_name, bucket_name, object_name, put_object_body,
+                   content_md5=None, opc_meta=None, **kwargs):
+        self._registrar("put_object", object_name)
+        datos = _leer_cuerpo(put_object_body)
+        md5 = _md5_b64(datos)
+        if content_md5 and content_md5 != md5:
+            raise ServiceError(400, "InvalidContentMD5", {}, f"{object_name}: Content-MD5 no coincide")
+
+        version_id = self._guardar(
+            bucket_name, object_name, datos, {f"opc-meta-{k}": v for k, v in (opc_meta or {}).items()}
+        )
+        cabeceras = {"etag": uuid.uuid4().hex, "opc-content-md5": md5, "version-id": version_id}
+        return Respuesta(status=200, headers=cabeceras, data=None)
+
+    def get_object(self, namespace_name, bucket_name, object_name, **kwargs):
+        self._registrar("get_object", object_name)
+        ruta = self._ruta(bucket_name, object_name)
+        if not os.path.isfile(ruta):
+            raise self._no_existe(object_name)
+        with open(ruta, "rb") as f:
+            return Respuesta(status=200, headers={}, data=SimpleNamespace(content=f.read()))
+
+    def head_object(self, namespace_name, bucket_name, object_name, **kwargs):
+        self._registrar("head_object", object_name)
+        ruta = self._ruta(bucket_name, object_name)
+        if not os.path.isfile(ruta):
+            raise self._no_existe(object_name)
+        with open(self._ruta_metadatos(bucket_name, object_name), encoding="utf-8") as f:
+            cabeceras = json.load(f)
+        cabeceras["content-length"] = str(os.path.getsize(ruta))
+        return Respuesta(status=200, headers=cabeceras, data=None)
+
+    def delete_object(self, namespace_name, bucket_name, object_name, version_id=None, **kwargs):
+        self._registrar("delete_object", object_name, version_id)
+        ruta = self._ruta(bucket_name, object_name)
+        directorio = self._directorio_versiones(bucket_name, object_name)
+
+        if version_id is not None:
+            ruta_version = os.path.join(directorio, version_id)
+            if not os.path.isfile(ruta_version):
+                raise self._no_existe(f"{object_name} ({version_id})")
+            actual = max(os.listdir(directorio))
+            os.remove(ruta_version)
+            if version_id != actual:
+                return Respuesta(status=204, headers={}, data=None)
+            # Se borró la versión actual: pasa a serlo la anterior, si la hay
+            restantes = sorted(os.listdir(directorio))
+            if restantes:
+                shutil.copyfile(os.path.join(directorio, restantes[-1]), ruta)
+                return Respuesta(status=204, headers={}, data=None)
+
+        if not os.path.isfile(ruta):
+            raise self._no_existe(object_name)
+        os.remove(ruta)
+        os.remove(self._ruta_metadatos(bucket_name, object_name))
+        return Respuesta(status=204, headers={}, data=None)
+
+    def list_object_versions(self, namespace_name, bucket_name, prefix=None, start=None,
+                             page=None, limit=None, **kwargs):
+        self._registrar("list_object_versions", prefix, page)
+        base = os.path.join(self.raiz, ".versiones", bucket_name)
+        versiones = []
+        for carpeta, _, archivos in os.walk(base):
+            nombre = os.path.relpath(carpeta, base).replace(os.sep, "/")
+            if prefix and not nombre.startswith(prefix) or start and nombre < start:
+                continue
+            for version_id in archivos:
+                ruta = os.path.join(carpeta, version_id)
+                creado = datetime.fromtimestamp(int(version_id.split("-")[0]) / 1e9, timezone.utc)
+                versiones.append(SimpleNamespace(
+                    name=nombre, version_id=version_id, size=os.path.getsize(ruta),
+                    time_created=creado, time_modified=creado, is_delete_marker=False,
+                ))
+        # Como OCI: por nombre y, dentro de cada objeto, la más reciente primero
+        versiones.sort(key=lambda v: v.version_id, reverse=True)
+        versiones.sort(key=lambda v: v.name)
+
+        desde = int(page or 0)
+        hasta = desde + (limit or self.limite_pagina)
+        cabeceras = {"opc-next-page": str(hasta)} if hasta < len(versiones) else {}
+        return Respuesta(status=200, headers=cabeceras, data=SimpleNamespace(items=versiones[desde:hasta], prefixes=[]))
+
+    # --- MULTIPART ---
+
+    def _directorio_upload(self, upload_id):
+        return os.path.join(self.raiz, ".multipart", upload_id)
+
+    def create_multipart_upload(self, namespace_name, bucket_name, create_multipart_upload_details, **kwargs):
+        upload_id = uuid.uuid4().hex
+        self._registrar("create_multipart_upload", create_multipart_upload_details.object)
+        os.makedirs(self._directorio_upload(upload_id))
+        with open(os.path.join(self._directorio_upload(upload_id), "metadatos.json"), "w", encoding="utf-8") as f:
+            json.dump(create_multipart_upload_details.metadata or {}, f)
+        return Respuesta(status=200, headers={}, data=SimpleNamespace(upload_id=upload_id))
+
+    def upload_part(self, namespace_name, bucket_name, object_name, upload_id, upload_part_num,
+                    upload_part_body, content_md5=None, **kwargs):
+        self._registrar("upload_part", object_name, upload_part_num)
+        with self._lock:
+            pendientes = self.fallos_partes.get(upload_part_num, 0)
+            if pendientes:
+                self.fallos_partes[upload_part_num] = pendientes - 1
+        if pendientes:
+            raise ServiceError(503, "ServiceUnavailable", {}, f"parte {upload_part_num} (simulado)")
+
+        datos = _leer_cuerpo(upload_part_body)
+        if content_md5 and content_md5 != _md5_b64(datos):
+            raise ServiceError(400, "InvalidContentMD5", {}, f"parte {upload_part_num}: Content-MD5 no coincide")
+
+        with open(os.path.join(self._directorio_upload(upload_id), f"{upload_part_num:05d}"), "wb") as f:
+            f.write(datos)
+        return Respuesta(status=200, headers={"etag": hashlib.md5(datos).hexdigest()}, data=None)
+
+    def commit_multipart_upload(self, namespace_name, bucket_name, object_name, upload_id,
+                                commit_multipart_upload_details, **kwargs):
+        self._registrar("commit_multipart_upload", object_name)
+        directorio = self._directorio_upload(upload_id)
+
+        trozos, digests = [], []
+        for parte in sorted(commit_multipart_upload_details.parts_to_commit, key=lambda p: p.part_num):
+            with open(os.path.join(directorio, f"{parte.part_num:05d}"), "rb") as f:
+                datos = f.read()
+            if hashlib.md5(datos).hexdigest() != parte.etag:
+                raise ServiceError(400, "InvalidPart", {}, f"parte {parte.part_num}: etag no coincide")
+            trozos.append(datos)
+            digests.append(hashlib.md5(datos).digest())
+        with open(os.path.join(directorio, "metadatos.json"), encoding="utf-8") as f:
+            metadatos = json.load(f)
+        version_id = self._guardar(bucket_name, object_name, b"".join(trozos), metadatos)
+        shutil.rmtree(directorio)
+
+        md5 = f"{_md5_b64(b''.join(digests))}-{len(digests)}"
+        cabeceras = {"etag": uuid.uuid4().hex, "opc-multipart-md5": md5, "version-id": version_id}
+        return Respuesta(status=200, headers=cabeceras, data=None)
+
+    def abort_multipart_upload(self, namespace_name, bucket_name, object_name, upload_id, **kwargs):
+        self._registrar("abort_multipart_upload", object_name)
+        shutil.rmtree(self._directorio_upload(upload_id), ignore_errors=True)
+        return Respuesta(status=204, headers={}, data=None)
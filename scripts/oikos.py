@@ -0,0 +1,88 @@
+# ============================================================================
+# 🧭 OIKOS: PUNTO DE ENTRADA ÚNICO (SINCRONIZACIÓN Y EXPORTACIÓN)
+# ============================================================================
+# Uso:
+#   python oikos.py sync deals   [--desde 2024-01-01] [--modo-detalles selectivo]
+#   python oikos.py sync tasks   [--desde 2024-01-01] [--hilos-merge 8] [--no-por-rangos]
+#   python oikos.py export parquet [--modo incremental] [--forzar]
+#
+# - Al arrancar solo se carga argparse: el módulo del subcomando (pandas,
+#   SQLAlchemy, SDK de OCI...) se importa cuando se ejecuta, y el engine de
+#   Oracle y los clientes HTTP/OCI se crean dentro de su main()
+# - Las opciones se traducen a las variables de entorno de siempre antes de
+#   importar el módulo, así que ambos modos de configuración siguen valiendo
+# - Los scripts se pueden seguir lanzando directamente (python parquet_to_oci.py)
+# - Backfills: con --desde el MERGE va por rangos de ID en paralelo
+#   (--hilos-merge, --filas-rango); --por-rangos / --no-por-rangos lo fuerzan
+#   en cualquier ejecución (MERGE_POR_RANGOS=1/0)
+# ============================================================================
+
+import argparse
+import importlib
+import os
+import sys
+
+# subcomando -> objetivo -> módulo con main()
+COMANDOS = {
+    "sync": {
+        "deals": "oportunidades_oracle",
+        "tasks": "actividades_oracle",
+    },
+    "export": {
+        "parquet": "parquet_to_oci",
+    },
+}
+
+# opción de la CLI -> variable de entorno que lee el módulo
+VARIABLES = {
+    "desde": "FECHA_DESDE",
+    "modo_detalles": "MODO_DETALLES",
+    "tamano_lote": "TAMANO_LOTE_MERGE",
+    "hilos_merge": "MERGE_HILOS",
+    "filas_rango": "MERGE_FILAS_RANGO",
+    "modo": "EXPORT_MODO",
+    "tablas_paralelas": "EXPORT_TABLAS_PARALELAS",
+}
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="oikos", description="Sincronización Clientify → Oracle y exportación a OCI")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    sync = subcomandos.add_parser("sync", help="Sincroniza cambios de Clientify en Oracle")
+    sync.add_argument("objetivo", choices=sorted(COMANDOS["sync"]))
+    sync.add_argument("--desde", help="Punto de partida ISO (backfill, activa el MERGE por rangos); por defecto, el watermark")
+    sync.add_argument("--modo-detalles", choices=("completo", "selectivo"))
+    sync.add_argument("--tamano-lote", type=int, help="Registros por lote de MERGE")
+    sync.add_argument("--por-rangos", action=argparse.BooleanOptionalAction,
+                      help="MERGE por rangos de ID en sesiones paralelas; por defecto, solo con --desde")
+    sync.add_argument("--hilos-merge", type=int, help="Rangos mergeados a la vez en el modo por rangos (4)")
+    sync.add_argument("--filas-rango", type=int, help="Filas máximas por rango de ID (10000)")
+
+    export = subcomandos.add_parser("export", help="Exporta las tablas de Oracle a OCI Object Storage")
+    export.add_argument("objetivo", choices=sorted(COMANDOS["export"]))
+    export.add_argument("--modo", choices=("completo", "incremental"))
+    export.add_argument("--forzar", action="store_true", help="Sube aunque la huella no haya cambiado")
+    export.add_argument("--tablas-paralelas", type=int)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+
+    for opcion, variable in VARIABLES.items():
+        valor = getattr(args, opcion, None)
+        if valor is not None:
+            os.environ[variable] = str(valor)
+    if getattr(args, "forzar", False):
+        os.environ["EXPORT_FORZAR"] = "1"
+    if getattr(args, "por_rangos", None) is not None:
+        os.environ["MERGE_POR_RANGOS"] = "1" if args.por_rangos else "0"
+
+    # El módulo lee su configuración del entorno al importarse: va después
+    modulo = importlib.import_module(COMANDOS[args.comando][args.objetivo])
+    modulo.main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,20 @@
 # ============================================================================
 # SCRIPT COMPLETO: Oracle -> Parquet -> OCI Object Storage
-# SIN CHUNKS - LECTURA COMPLETA GARANTIZADA
+# LECTURA EN STREAMING POR LOTES - CONTROL DE REGISTROS CONTRA COUNT(*)
+# TABLAS EN PARALELO (EXPORT_TABLAS_PARALELAS) CON UNA BARRA POR TABLA
 # ============================================================================
 
 import os
-import pandas as pd
-import json
 import tempfile
 import time
-from sqlalchemy import create_engine
-from oci.object_storage import ObjectStorageClient
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
-
-print("=" * 80)
-print("🚀 INICIO DEL PROCESO ETL: OPORTUNIDADES + ACTIVIDADES")
-print("=" * 80)
+from esquemas import OPORTUNIDADES, ACTIVIDADES
+from exportacion_parquet import exportar_tabla, huella_tabla
+from subida_oci import leer_metadatos, subir_archivo
+from purga_versiones import PURGAR_VERSIONES, purgar_en_segundo_plano
+from conexion_oracle import POOL_MAX, cerrar_engine, crear_engine
+from metricas import METRICAS
 
 # --- CREDENCIALES ORACLE (DB Fuente) ---
 ORACLE_USER = os.environ.get('ORACLE_USER')
@@ -32,110 +32,116 @@ TENANCY_OCID = os.environ.get('OCI_TENANCY_OCID')
 KEY_FINGERPRINT = os.environ.get('OCI_KEY_FINGERPRINT')
 PRIVATE_KEY_CONTENT = os.environ.get('OCI_PRIVATE_KEY')
 
-# Validación de credenciales
-required_vars = [
-    ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
-    BUCKET_NAME, REGION, NAMESPACE,
-    USER_OCID, TENANCY_OCID, KEY_FINGERPRINT, PRIVATE_KEY_CONTENT
-]
-
-if not all(required_vars):
-    raise ValueError("❌ Faltan variables de entorno. Verifica los Secrets en GitHub.")
+# Pruebas: sube a este directorio con el sustituto local en lugar de a OCI
+OCI_LOCAL_DIR = os.environ.get('OCI_LOCAL_DIR')
+if OCI_LOCAL_DIR:
+    BUCKET_NAME = BUCKET_NAME or 'local'
+    NAMESPACE = NAMESPACE or 'local'
 
 # --- CONFIGURACIÓN DE TABLAS A PROCESAR ---
+# Columnas y tipos salen del registro compartido (esquemas.py)
 TABLAS_CONFIG = [
     {
-        "tabla": "OPORTUNIDADES_REAL",
+        "esquema": OPORTUNIDADES,
         "archivo": "Archivos_ParquetOportunidades_Real.parquet",
+        "dataset": "Dataset_Oportunidades_Real",
         "nombre": "OPORTUNIDADES"
     },
     {
-        "tabla": "ACTIVIDADES_TOTALES",
+        "esquema": ACTIVIDADES,
         "archivo": "Archivos_ParquetActividades_Total.parquet",
+        "dataset": "Dataset_Actividades_Total",
         "nombre": "ACTIVIDADES"
     }
 ]
 
+# 'completo': reescribe el Parquet único de cada tabla (comportamiento original)
+# 'incremental': sube solo los cambios al dataset particionado (ver dataset_incremental.py)
+EXPORT_MODO = os.environ.get('EXPORT_MODO', 'completo')
+
+# El Parquet completo se omite si la huella de la tabla coincide con la del
+# objeto ya subido (metadato opc-meta-huella); EXPORT_FORZAR=1 sube siempre
+EXPORT_FORZAR = os.environ.get('EXPORT_FORZAR') == '1'
+
+# Tablas exportándose a la vez: mientras una lee de Oracle otra codifica o sube
+TABLAS_PARALELAS = int(os.environ.get('EXPORT_TABLAS_PARALELAS', len(TABLAS_CONFIG)))
+
 # --- CONFIGURACIÓN OCI ---
 KEY_FILE_PATH = "/tmp/oci_key_new.pem"
 OBJECT_STORAGE_CLIENT = None
+PURGAS_PENDIENTES = {}      # object_name -> Future de la purga de versiones
 
-try:
-    with open(KEY_FILE_PATH, 'w') as f:
-        f.write(PRIVATE_KEY_CONTENT.strip())
 
-    OCI_CONFIG = {
-        "user": USER_OCID,
-        "fingerprint": KEY_FINGERPRINT,
-        "key_file": KEY_FILE_PATH,
-        "tenancy": TENANCY_OCID,
-        "region": REGION
-    }
+def validar_entorno():
+    """Credenciales obligatorias; se comprueban al ejecutar, no al importar"""
+    required_vars = [
+        ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
+        BUCKET_NAME, NAMESPACE
+    ]
+    if not OCI_LOCAL_DIR:
+        required_vars += [REGION, USER_OCID, TENANCY_OCID, KEY_FINGERPRINT, PRIVATE_KEY_CONTENT]
+
+    if not all(required_vars):
+        raise ValueError("❌ Faltan variables de entorno. Verifica los Secrets en GitHub.")
+
 
-    OBJECT_STORAGE_CLIENT = ObjectStorageClient(OCI_CONFIG)
-    print("✅ Configuración OCI SDK exitosa.\n")
-
-except Exception as e:
-    print(f"❌ Error al configurar OCI SDK: {e}")
-    import traceback
-    traceback.print_exc()
-    raise
-
-# --- FUNCIONES DE LIMPIEZA ---
-def clean_clob_pilo(value):
-    """Limpia valores CLOB y convierte JSON strings si aplica"""
-    if value is None or pd.isna(value):
-        return None
-    if isinstance(value, (list, dict)):
-        return value
-    text_val = str(value).strip()
-    if text_val.startswith('[') or text_val.startswith('{'):
-        try:
-            return json.loads(text_val)
-        except:
-            pass
-    return text_val
-
-def limpiar_versiones_antiguas(client, namespace, bucket_name, object_name):
-    """Elimina TODAS las versiones anteriores de un objeto"""
+def configurar_oci():
+    """Crea OBJECT_STORAGE_CLIENT (escribe la clave privada solo si se usa OCI real)"""
+    global OBJECT_STORAGE_CLIENT
     try:
-        versions = client.list_object_versions(
-            namespace_name=namespace,
-            bucket_name=bucket_name,
-            prefix=object_name
-        ).data.items
+        if OCI_LOCAL_DIR:
+            from object_storage_local import ObjectStorageLocal
+            OBJECT_STORAGE_CLIENT = ObjectStorageLocal(OCI_LOCAL_DIR)
+            print(f"🧪 Object Storage local en {OCI_LOCAL_DIR}\n")
+        else:
+            from oci.object_storage import ObjectStorageClient
 
-        if not versions:
-            return
+            with open(KEY_FILE_PATH, 'w') as f:
+                f.write(PRIVATE_KEY_CONTENT.strip())
 
-        for version in versions:
-            try:
-                client.delete_object(
-                    namespace_name=namespace,
-                    bucket_name=bucket_name,
-                    object_name=version.name,
-                    version_id=version.version_id
-                )
-            except:
-                pass
-
-    except:
-        pass
-
-def upload_to_oci_force_overwrite(client, namespace, bucket_name, object_name, file_path, pbar):
+            OCI_CONFIG = {
+                "user": USER_OCID,
+                "fingerprint": KEY_FINGERPRINT,
+                "key_file": KEY_FILE_PATH,
+                "tenancy": TENANCY_OCID,
+                "region": REGION
+            }
+
+            OBJECT_STORAGE_CLIENT = ObjectStorageClient(OCI_CONFIG)
+            print("✅ Configuración OCI SDK exitosa.\n")
+
+    except Exception as e:
+        print(f"❌ Error al configurar OCI SDK: {e}")
+        import traceback
+        traceback.print_exc()
+        raise
+
+def upload_to_oci_force_overwrite(client, namespace, bucket_name, object_name, file_path, pbar, metadatos=None):
     """Sube archivo a OCI con sobrescritura REAL"""
     if not client:
         return False
 
     try:
-        limpiar_versiones_antiguas(client, namespace, bucket_name, object_name)
-
-        with open(file_path, 'rb') as f:
-            client.put_object(
-                namespace_name=namespace,
-                bucket_name=bucket_name,
-                object_name=object_name,
-                put_object_body=f
+        # Multipart en paralelo con reintento por parte y verificación MD5
+        tamano = os.path.getsize(file_path)
+        subidos = 0
+
+        def _progreso(bytes_parte):
+            nonlocal subidos
+            subidos += bytes_parte
+            pbar.set_description(f"☁️ Subiendo {object_name}: {subidos / tamano:.0%}")
+
+        with METRICAS.fase("subida"):
+            resumen = subir_archivo(client, namespace, bucket_name, object_name, file_path,
+                                    al_subir_parte=_progreso, metadatos=metadatos)
+            METRICAS.sumar("bytes", resumen["bytes"])
+            METRICAS.sumar("partes", resumen["partes"])
+        print(f"\n   ☁️ {object_name}: {resumen['partes']} partes, MD5 verificado")
+
+        # Versiones anteriores: se purgan en segundo plano conservando la recién subida
+        if PURGAR_VERSIONES:
+            PURGAS_PENDIENTES[object_name] = purgar_en_segundo_plano(
+                client, namespace, bucket_name, object_name, conservar=resumen["version_id"]
             )
 
         return True
@@ -145,72 +151,80 @@ def upload_to_oci_force_overwrite(client, namespace, bucket_name, object_name, f
         return False
 
 # --- FUNCIÓN PARA PROCESAR UNA TABLA ---
+def procesar_tabla_incremental(config, engine, pbar):
+    """Sube los cambios de una tabla a su dataset particionado en OCI"""
+    from dataset_incremental import exportar_incremental
+
+    nombre = config["nombre"]
+    try:
+        pbar.set_description(f"🗂️ {nombre}: Exportando cambios")
+        resumen = exportar_incremental(
+            engine, config["esquema"], OBJECT_STORAGE_CLIENT,
+            NAMESPACE, BUCKET_NAME, config["dataset"]
+        )
+        mb = resumen["bytes"] / (1024 * 1024)
+        print(f"\n   📊 {nombre} ({resumen['modo']}): {resumen['registros']:,} registros en "
+              f"{resumen['particiones']} particiones, {resumen['compactadas']} compactadas → {mb:.2f} MB")
+        pbar.set_description(f"✅ {nombre}: Dataset actualizado")
+        pbar.update(100)
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Error en {nombre}: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def procesar_tabla(config, engine, pbar):
     """Procesa una tabla: extrae, limpia y sube a OCI"""
-    tabla = config["tabla"]
+    esquema = config["esquema"]
     archivo = config["archivo"]
     nombre = config["nombre"]
 
     ruta_temporal = None
 
     try:
+        # 0. ¿Cambió algo desde la última subida?
+        pbar.set_description(f"🔎 {nombre}: Comprobando cambios")
+        huella = huella_tabla(engine, esquema)
+        remotos = leer_metadatos(OBJECT_STORAGE_CLIENT, NAMESPACE, BUCKET_NAME, archivo) or {}
+        if remotos.get("huella") == huella and not EXPORT_FORZAR:
+            print(f"\n   ⏭️ {nombre}: sin cambios desde la última subida, se omite")
+            pbar.set_description(f"✅ {nombre}: Sin cambios")
+            pbar.update(100)
+            return True
+
         with tempfile.NamedTemporaryFile(suffix=".parquet", delete=False) as tmp:
             ruta_temporal = tmp.name
 
-        # 1. LECTURA COMPLETA (SIN CHUNKS) - LEE TODO DE UNA VEZ
-        pbar.set_description(f"📚 {nombre}: Leyendo TODOS los datos")
+        # 1. Oracle -> Parquet por lotes (tipos del esquema, memoria acotada al lote)
+        pbar.set_description(f"📚 {nombre}: Exportando por lotes")
         inicio = time.time()
+        leidos = 0
 
-        # LECTURA DIRECTA SIN CHUNKS - GARANTIZA TODOS LOS REGISTROS
-        df = pd.read_sql(f'SELECT * FROM "{tabla}"', engine)
+        def _progreso(filas):
+            nonlocal leidos
+            leidos += filas
+            pbar.set_description(f"📚 {nombre}: {leidos:,} registros leídos")
 
+        esperados, escritos = exportar_tabla(engine, esquema, ruta_temporal, al_leer_lote=_progreso)
         duracion = time.time() - inicio
 
-        if df.empty:
+        if esperados == 0:
             pbar.set_description(f"⚠️ {nombre}: Vacío")
             return False
 
-        registros_leidos = len(df)
-        pbar.set_description(f"✅ {nombre}: {registros_leidos:,} registros en {duracion:.1f}s")
-        pbar.update(30)
-
-        # 2. Limpieza MÍNIMA (sin eliminar registros)
-        pbar.set_description(f"🧹 {nombre}: Limpiando columnas")
-
-        # Solo limpiar columnas específicas de texto
-        cols_texto = ['LOST_REASON', 'SOURCE', 'DEAL_SOURCE', 'REMARKS', 'STATUS_DESC']
-        for col in cols_texto:
-            if col in df.columns:
-                df[col] = df[col].astype(str).replace({
-                    'None': None, 'nan': None, '<NA>': None
-                })
-
-        # Procesar columnas objeto solo si tienen JSON
-        cols_obj = df.select_dtypes(include=['object']).columns
-        for col in cols_obj:
-            df[col] = df[col].apply(clean_clob_pilo)
-
-            sample = df[col].dropna()
-            if len(sample) > 0:
-                todas_listas = all(isinstance(x, list) for x in sample.head(50))
-                if todas_listas:
-                    df[col] = df[col].apply(lambda x: x if isinstance(x, list) else None)
-
         # VERIFICAR QUE NO SE PERDIERON REGISTROS
-        if len(df) != registros_leidos:
+        if escritos != esperados:
             print(f"\n⚠️ ALERTA: Se perdieron registros en {nombre}!")
-            print(f"   Antes: {registros_leidos:,} | Después: {len(df):,}")
-
-        pbar.update(30)
+            print(f"   COUNT(*): {esperados:,} | Parquet: {escritos:,}")
+            pbar.set_description(f"❌ {nombre}: Conteo no coincide")
+            return False
 
-        # 3. Guardar Parquet
-        pbar.set_description(f"💾 {nombre}: Creando Parquet")
-        df.to_parquet(ruta_temporal, index=False, engine='pyarrow')
         tamaño_mb = os.path.getsize(ruta_temporal) / (1024 * 1024)
+        print(f"\n   📊 {nombre}: {escritos:,} registros → {tamaño_mb:.2f} MB en {duracion:.1f}s")
 
-        print(f"\n   📊 {nombre}: {len(df):,} registros → {tamaño_mb:.2f} MB")
-
-        pbar.update(20)
+        pbar.update(80)
 
         # 4. Subir a OCI
         pbar.set_description(f"☁️ {nombre}: Subiendo a OCI ({tamaño_mb:.1f} MB)")
@@ -220,11 +234,12 @@ def procesar_tabla(config, engine, pbar):
             bucket_name=BUCKET_NAME,
             object_name=archivo,
             file_path=ruta_temporal,
-            pbar=pbar
+            pbar=pbar,
+            metadatos={"huella": huella, "registros": str(escritos)}
         )
 
         if resultado:
-            pbar.set_description(f"✅ {nombre}: Completado ({len(df):,} reg, {tamaño_mb:.1f} MB)")
+            pbar.set_description(f"✅ {nombre}: Completado ({escritos:,} reg, {tamaño_mb:.1f} MB)")
         else:
             pbar.set_description(f"❌ {nombre}: Error al subir")
 
@@ -244,32 +259,63 @@ def procesar_tabla(config, engine, pbar):
 
 # --- FUNCIÓN PRINCIPAL ---
 def main():
+    print("=" * 80)
+    print("🚀 INICIO DEL PROCESO ETL: OPORTUNIDADES + ACTIVIDADES")
+    print("=" * 80)
+
+    validar_entorno()
+    configurar_oci()
     if not OBJECT_STORAGE_CLIENT:
         print("❌ No se puede continuar sin OCI.")
         return
 
-    try:
-        engine = create_engine(
-            f"oracle+oracledb://{ORACLE_USER}:{ORACLE_PASSWORD}@{ORACLE_DSN}"
-        )
-
-        print("✅ Conexión a Oracle establecida.\n")
-
-        resultados = {}
-        total_pasos = len(TABLAS_CONFIG) * 100
+    METRICAS.proceso = "export_parquet"
+    engine = None
 
-        with tqdm(total=total_pasos, desc="🚀 Procesando", unit="%", ncols=100) as pbar:
-            for config in TABLAS_CONFIG:
-                exito = procesar_tabla(config, engine, pbar)
-                resultados[config["nombre"]] = exito
+    try:
+        # Una sesión por tabla en curso, reutilizada entre la huella y la lectura
+        engine = crear_engine(ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
+                              maximo=max(POOL_MAX, TABLAS_PARALELAS))
+
+        print("✅ Pool de conexiones a Oracle listo.\n")
+
+        procesar = procesar_tabla_incremental if EXPORT_MODO == 'incremental' else procesar_tabla
+
+        def _procesar_con_barra(posicion, config):
+            inicio = time.time()
+            with METRICAS.fase(config["nombre"]), \
+                    tqdm(total=100, desc=f"⏳ {config['nombre']}", unit="%", ncols=100, position=posicion) as pbar:
+                try:
+                    exito = procesar(config, engine, pbar)
+                except Exception as e:
+                    print(f"\n❌ Error en {config['nombre']}: {e}")
+                    exito = False
+            return exito, time.time() - inicio
+
+        # Una barra y un estado por tabla; como mucho TABLAS_PARALELAS a la vez
+        with ThreadPoolExecutor(max_workers=max(1, TABLAS_PARALELAS)) as pool:
+            futuros = {
+                config["nombre"]: pool.submit(_procesar_con_barra, i, config)
+                for i, config in enumerate(TABLAS_CONFIG)
+            }
+            resultados = {nombre: futuro.result() for nombre, futuro in futuros.items()}
+
+        # Purgas de versiones lanzadas tras cada subida
+        for objeto, futuro in PURGAS_PENDIENTES.items():
+            try:
+                borradas, fallidas = futuro.result()
+                print(f"🧹 {objeto}: {borradas} versiones antiguas borradas"
+                      + (f", {fallidas} fallidas" if fallidas else ""))
+            except Exception as e:
+                print(f"⚠️ {objeto}: purga de versiones fallida: {e}")
 
         # Resumen
         print("\n" + "=" * 80)
         print("📊 RESUMEN FINAL")
         print("=" * 80)
-        for nombre, exito in resultados.items():
+        for nombre, (exito, duracion) in resultados.items():
             estado = "✅ ÉXITO" if exito else "❌ FALLÓ"
-            print(f"{estado} - {nombre}")
+            print(f"{estado} - {nombre} ({duracion:.1f}s)")
 
         print("\n🎉 Proceso completado.")
 
@@ -280,6 +326,9 @@ def main():
         raise
 
     finally:
+        METRICAS.escribir()
+        if engine is not None:
+            cerrar_engine(engine)
         if os.path.exists(KEY_FILE_PATH):
             os.remove(KEY_FILE_PATH)
 
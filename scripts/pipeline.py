@@ -0,0 +1,122 @@
+# ============================================================================
+# 🚰 PIPELINE EN STREAMING: DESCARGA → TRANSFORMACIÓN → CARGA
+# ============================================================================
+# - Las etapas se unen con colas acotadas (backpressure): si Oracle va lento,
+#   la descarga espera en lugar de acumular todo en memoria
+# - Cada lote de N detalles se transforma y se mergea en un hilo mientras
+#   siguen llegando detalles por la red
+# ============================================================================
+
+import asyncio
+
+TAMANO_LOTE_DEFECTO = 2000
+LOTES_EN_COLA = 2
+
+
+async def en_ventana(corrutinas, ventana):
+    """
+    Ejecuta las corrutinas con como mucho `ventana` pendientes a la vez y
+    entrega los resultados según terminan. Las corrutinas se crean a demanda,
+    así que un consumidor lento frena también el lanzamiento de requests.
+    Si una falla, las que quedan pendientes se cancelan y se esperan.
+    """
+    pendientes = set()
+    try:
+        for coro in corrutinas:
+            pendientes.add(asyncio.ensure_future(coro))
+            if len(pendientes) >= ventana:
+                hechos, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                for hecho in hechos:
+                    yield hecho.result()
+
+        while pendientes:
+            hechos, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            for hecho in hechos:
+                yield hecho.result()
+    finally:
+        # Error en una corrutina, consumidor que deja de iterar o cancelación:
+        # las que siguen en vuelo no se quedan huérfanas
+        for tarea in pendientes:
+            tarea.cancel()
+        if pendientes:
+            await asyncio.gather(*pendientes, return_exceptions=True)
+
+
+async def _poner(cola, valor, *etapas):
+    """put() en una cola acotada, abortando si alguna etapa posterior ya falló"""
+    put = asyncio.ensure_future(cola.put(valor))
+    await asyncio.wait({put, *etapas}, return_when=asyncio.FIRST_COMPLETED)
+    if put.done():
+        return
+    put.cancel()
+    for etapa in etapas:
+        if etapa.done():
+            etapa.result()  # Relanza el error de la etapa
+    raise RuntimeError("Etapa del pipeline terminada antes de tiempo")
+
+
+async def ejecutar_por_lotes(detalles, procesar, cargar, confirmar=None,
+                             tamano_lote=TAMANO_LOTE_DEFECTO, lotes_en_cola=LOTES_EN_COLA):
+    """
+    Consume el iterador asíncrono `detalles` en lotes de `tamano_lote`:
+      - procesar(lote) -> df        (en un hilo)
+      - cargar(df)                  (en un hilo, un lote a la vez)
+      - confirmar(df)               (en el event loop, tras cargar con éxito)
+    Si cargar falla con una excepción que trae `cargado` (filas del lote ya
+    confirmadas en destino), esas filas se confirman antes de propagar el error.
+    Devuelve (lotes, registros) cargados.
+    """
+    a_procesar = asyncio.Queue(maxsize=lotes_en_cola)
+    a_cargar = asyncio.Queue(maxsize=lotes_en_cola)
+    totales = {"lotes": 0, "registros": 0}
+
+    async def _transformador():
+        while True:
+            lote = await a_procesar.get()
+            if lote is None:
+                await _poner(a_cargar, None, cargador)
+                return
+            df = await asyncio.to_thread(procesar, lote)
+            await _poner(a_cargar, df, cargador)
+
+    async def _cargador():
+        while True:
+            df = await a_cargar.get()
+            if df is None:
+                return
+            if df.empty:
+                continue
+            try:
+                await asyncio.to_thread(cargar, df)
+            except Exception as e:
+                # Carga parcial (p. ej. MERGE por rangos): lo ya confirmado no se repite
+                cargado = getattr(e, "cargado", None)
+                if confirmar and cargado is not None and not cargado.empty:
+                    confirmar(cargado)
+                raise
+            if confirmar:
+                confirmar(df)
+            totales["lotes"] += 1
+            totales["registros"] += len(df)
+
+    cargador = asyncio.ensure_future(_cargador())
+    transformador = asyncio.ensure_future(_transformador())
+
+    try:
+        lote = []
+        async for detalle in detalles:
+            lote.append(detalle)
+            if len(lote) >= tamano_lote:
+                await _poner(a_procesar, lote, transformador, cargador)
+                lote = []
+        if lote:
+            await _poner(a_procesar, lote, transformador, cargador)
+        await _poner(a_procesar, None, transformador, cargador)
+        await transformador
+        await cargador
+    finally:
+        for etapa in (transformador, cargador):
+            if not etapa.done():
+                etapa.cancel()
+
+    return totales["lotes"], totales["registros"]
@@ -0,0 +1,67 @@
+# ============================================================================
+# 🧹 PURGA DE VERSIONES ANTIGUAS DE UN OBJETO EN OCI OBJECT STORAGE
+# ============================================================================
+# - Recorre todas las páginas de list_object_versions (opc-next-page) y se
+#   queda solo con las versiones cuyo nombre es EXACTAMENTE el del objeto
+#   (prefix= también devuelve "archivo.parquet.bak", "archivo.parquet_2"...)
+# - Borra en paralelo con un pool acotado (OCI_HILOS_PURGA)
+# - Se lanza DESPUÉS de subir, en segundo plano, conservando la versión recién
+#   subida: ya no bloquea la subida ni puede dejar el objeto sin versión actual
+# - Alternativa sin código: regla de ciclo de vida del bucket que borre las
+#   "previous object versions"; en ese caso OCI_PURGAR_VERSIONES=0
+# ============================================================================
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+HILOS_PURGA = int(os.environ.get("OCI_HILOS_PURGA", 8))
+PURGAR_VERSIONES = os.environ.get("OCI_PURGAR_VERSIONES", "1") != "0"
+
+_segundo_plano = ThreadPoolExecutor(max_workers=2, thread_name_prefix="purga")
+
+
+def listar_versiones(client, namespace, bucket, nombre):
+    """Todas las versiones de `nombre` (y solo de `nombre`), página a página"""
+    pagina = None
+    while True:
+        respuesta = client.list_object_versions(
+            namespace, bucket, prefix=nombre, start=nombre, page=pagina
+        )
+        for version in respuesta.data.items:
+            if version.name != nombre:
+                # Listado ordenado por nombre: lo que sigue ya es otro objeto
+                return
+            yield version
+        pagina = respuesta.headers.get("opc-next-page")
+        if not pagina:
+            return
+
+
+def purgar_versiones(client, namespace, bucket, nombre, conservar=None, hilos=HILOS_PURGA):
+    """
+    Borra todas las versiones de `nombre` salvo `conservar` (version_id); sin
+    él se conserva la más reciente. Devuelve (borradas, fallidas).
+    """
+    versiones = list(listar_versiones(client, namespace, bucket, nombre))
+    if not versiones:
+        return 0, 0
+    if conservar is None:
+        conservar = max(versiones, key=lambda v: v.time_created).version_id
+
+    def _borrar(version_id):
+        try:
+            client.delete_object(namespace, bucket, nombre, version_id=version_id)
+            return True
+        except Exception as e:
+            print(f"   ⚠️ No se pudo borrar {nombre} ({version_id}): {e}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        resultados = list(pool.map(_borrar, [v.version_id for v in versiones if v.version_id != conservar]))
+
+    return sum(resultados), len(resultados) - sum(resultados)
+
+
+def purgar_en_segundo_plano(client, namespace, bucket, nombre, conservar=None):
+    """Lanza la purga sin esperar; devuelve el Future con (borradas, fallidas)"""
+    return _segundo_plano.submit(purgar_versiones, client, namespace, bucket, nombre, conservar)
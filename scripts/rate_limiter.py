@@ -0,0 +1,179 @@
+# ============================================================================
+# 🚦 LIMITADOR ADAPTATIVO (TOKEN BUCKET + CONCURRENCIA AIMD)
+# ============================================================================
+# - Token bucket: ritmo de requests/segundo compartido por todos los workers
+# - Sube ritmo y concurrencia mientras las respuestas son rápidas
+# - Baja a la mitad y pausa con jitter ante 429, 5xx o Retry-After
+# ============================================================================
+
+import asyncio
+import random
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+ESTADOS_SATURACION = (429, 500, 502, 503, 504)
+
+
+def leer_retry_after(headers):
+    """Segundos de espera pedidos por el servidor (Retry-After o RateLimit-Reset), o None"""
+    if not headers:
+        return None
+
+    valor = headers.get("Retry-After")
+    if valor:
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            try:
+                fecha = parsedate_to_datetime(valor)
+                return max(0.0, fecha.timestamp() - time.time())
+            except (TypeError, ValueError):
+                return None
+
+    restantes = headers.get("X-RateLimit-Remaining") or headers.get("RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset") or headers.get("RateLimit-Reset")
+    if restantes is not None and reset is not None:
+        try:
+            if int(restantes) <= 0:
+                reset = float(reset)
+                # Algunos servidores envían epoch y otros segundos restantes
+                return max(0.0, reset - time.time()) if reset > 1e9 else reset
+        except ValueError:
+            return None
+
+    return None
+
+
+class LimitadorAdaptativo:
+    """
+    Limita ritmo (tokens/s) y requests en vuelo, adaptándose a las respuestas.
+
+    Uso por request:
+        await limitador.adquirir()
+        ... request ...
+        limitador.registrar(status, latencia, headers)
+
+    Una sola instancia se comparte entre todas las fases y workers del
+    cliente, así el ritmo aprendido en el listado se mantiene en los detalles.
+    """
+
+    def __init__(
+        self,
+        tasa_inicial=5.0,
+        tasa_min=0.5,
+        tasa_max=50.0,
+        concurrencia_inicial=5,
+        concurrencia_max=50,
+        latencia_objetivo=1.5,
+        pausa_base=2.0,
+    ):
+        self.tasa = tasa_inicial
+        self.tasa_min = tasa_min
+        self.tasa_max = tasa_max
+        self.concurrencia = min(concurrencia_inicial, concurrencia_max)
+        self.concurrencia_max = concurrencia_max
+        self.latencia_objetivo = latencia_objetivo
+        self.pausa_base = pausa_base
+
+        self._tokens = 1.0
+        self._ultima_recarga = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._ultimo_freno = 0.0
+        self._rapidas_seguidas = 0
+        self._en_vuelo = 0
+        self._esperando = deque()
+
+        self.frenos = 0
+
+    def _recargar(self, ahora):
+        capacidad = max(1.0, self.tasa)
+        self._tokens = min(capacidad, self._tokens + (ahora - self._ultima_recarga) * self.tasa)
+        self._ultima_recarga = ahora
+
+    async def adquirir(self):
+        """Espera un hueco de concurrencia y un token"""
+        while self._en_vuelo >= self.concurrencia:
+            turno = asyncio.get_running_loop().create_future()
+            self._esperando.append(turno)
+            try:
+                await turno
+            except asyncio.CancelledError:
+                # Si ya se nos había cedido el hueco, pasarlo al siguiente
+                if turno.done() and not turno.cancelled():
+                    self._despertar()
+                raise
+        self._en_vuelo += 1
+
+        try:
+            while True:
+                ahora = time.monotonic()
+                if ahora < self._pausa_hasta:
+                    await asyncio.sleep(self._pausa_hasta - ahora)
+                    continue
+                self._recargar(ahora)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.tasa)
+        except asyncio.CancelledError:
+            self.liberar()
+            raise
+
+    def registrar(self, status, latencia, headers=None):
+        """Libera el hueco y ajusta ritmo/concurrencia según la respuesta (status None = error de red)"""
+        retry_after = leer_retry_after(headers)
+
+        if status in ESTADOS_SATURACION or status is None or retry_after is not None:
+            self._frenar(retry_after)
+        elif status == 200 and latencia < self.latencia_objetivo:
+            self._acelerar()
+        else:
+            self._rapidas_seguidas = 0
+
+        self.liberar()
+
+    def liberar(self):
+        """Libera el hueco sin juzgar la respuesta (plazo propio agotado, cancelación)"""
+        self._en_vuelo -= 1
+        self._despertar()
+
+    def _despertar(self):
+        libres = self.concurrencia - self._en_vuelo
+        while libres > 0 and self._esperando:
+            turno = self._esperando.popleft()
+            if not turno.done():
+                turno.set_result(None)
+                libres -= 1
+
+    def _frenar(self, retry_after):
+        """Decremento multiplicativo (una vez por ráfaga de errores) + pausa con jitter"""
+        ahora = time.monotonic()
+        self._rapidas_seguidas = 0
+
+        pausa = retry_after if retry_after is not None else self.pausa_base
+        pausa *= random.uniform(1.0, 1.5)
+        self._pausa_hasta = max(self._pausa_hasta, ahora + pausa)
+
+        # Todas las requests en vuelo de la misma ráfaga cuentan como un solo freno
+        if ahora - self._ultimo_freno < pausa:
+            return
+        self._ultimo_freno = ahora
+        self.frenos += 1
+        self.tasa = max(self.tasa_min, self.tasa / 2)
+        self.concurrencia = max(1, self.concurrencia // 2)
+        self._tokens = min(self._tokens, 0.0)
+
+    def _acelerar(self):
+        """Incremento aditivo: +1 req/s por cada `tasa` respuestas rápidas, +1 de concurrencia por ronda"""
+        self.tasa = min(self.tasa_max, self.tasa + 1.0 / max(self.tasa, 1.0))
+        self._rapidas_seguidas += 1
+        if self._rapidas_seguidas >= self.concurrencia and self.concurrencia < self.concurrencia_max:
+            self._rapidas_seguidas = 0
+            self.concurrencia += 1
+
+    def resumen(self):
+        return (
+            f"{self.tasa:.1f} req/s, {self.concurrencia} en vuelo, "
+            f"{self.frenos} frenos por saturación"
+        )
@@ -0,0 +1,26 @@
+# ============================================================================
+# 🔁 POLÍTICA DE REINTENTOS (CLIENTE CLIENTIFY Y SUBIDAS A OCI)
+# ============================================================================
+# - Módulo sin dependencias: la exportación la usa sin cargar aiohttp
+# ============================================================================
+
+import random
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class PoliticaReintentos:
+    """
+    Cuántas veces y con qué espera se reintenta un request fallido.
+    Tras un 429/5xx la espera la impone el limitador (pausa global con
+    jitter); el backoff propio solo se aplica a errores de red.
+    """
+    max_intentos: int = 3
+    espera_base: float = 1.0
+    espera_max: float = 30.0
+    reintentar_errores_red: bool = True
+
+    def espera(self, intento):
+        """Backoff exponencial con jitter para el intento dado (0, 1, 2...)"""
+        tope = min(self.espera_max, self.espera_base * (2 ** intento))
+        return random.uniform(tope / 2, tope)
@@ -0,0 +1,454 @@
+# ============================================================================
+# 🔄 SINCRONIZACIÓN CLIENTIFY → ORACLE (FLUJO COMPARTIDO DEALS / TASKS)
+# ============================================================================
+# - Un único flujo para los dos recursos: cola de trabajo → estimación y
+#   listado desde el watermark → selección de detalles → detalles, lotes y
+#   MERGE en streaming (memoria acotada) → tope del watermark
+# - Cada script solo declara su ConfigSync (esquema, URL y ajustes del
+#   cliente HTTP) y llama a main(config)
+# - Cliente asíncrono compartido por todas las fases (keep-alive, limitador
+#   adaptativo); un ID que falla va a la cola de reintentos, no aborta
+# ============================================================================
+
+import asyncio
+import math
+import os
+import time
+from dataclasses import dataclass
+from functools import partial
+
+from colorama import Fore, init
+from tqdm import tqdm
+
+from carga_oracle import (
+    COLUMNA_HASH, GRADO_PARALLEL_DML, MERGE_HILOS,
+    asegurar_columna_hash, cargar_y_mergear, hash_filas, merge_por_rangos, modo_por_rangos,
+)
+from clientify_client import ClientifyClient
+from cola_trabajo import DESCARGADO, MUERTO, ColaTrabajo
+from conexion_oracle import POOL_MAX, cerrar_engine, crear_engine, resumen_pool
+from detalle_cache import CacheDetalles
+from detalle_selectivo import MODO_COMPLETO, MODO_SELECTIVO, cargar_modificados, separar_items
+from metricas import METRICAS
+from pipeline import TAMANO_LOTE_DEFECTO, ejecutar_por_lotes, en_ventana
+from rate_limiter import LimitadorAdaptativo
+from watermark import calcular_fecha_filtro, guardar_watermark, limitar_watermark, maximo_modified
+
+init(autoreset=True)
+
+# --- CONFIGURACIÓN COMÚN (VARIABLES DE ENTORNO) ---
+
+# Punto de partida: watermark guardado en Oracle (máximo `modified` mergeado).
+# DIAS_ATRAS solo aplica si aún no hay watermark; FECHA_DESDE (ISO) lo fuerza para backfills.
+DIAS_ATRAS = 1
+FECHA_DESDE = os.environ.get('FECHA_DESDE')
+
+# Credenciales (GitHub Secrets)
+API_TOKEN = os.environ.get('CLIENTIFY_API_TOKEN')
+ORACLE_USER = os.environ.get('ORACLE_USER')
+ORACLE_PASSWORD = os.environ.get('ORACLE_PASSWORD')
+ORACLE_DSN = os.environ.get('ORACLE_DSN')
+
+# Cliente HTTP: requests concurrentes en vuelo y ritmo del limitador
+CONCURRENCIA = int(os.environ.get('CLIENTIFY_CONCURRENCIA', 20))
+TASA_INICIAL = float(os.environ.get('CLIENTIFY_TASA_INICIAL', 5))     # req/s al arrancar
+TASA_MAX = float(os.environ.get('CLIENTIFY_TASA_MAX', 25))            # techo de req/s
+
+# 'selectivo': omite el GET de detalle si el registro no cambió o el listado ya basta
+MODO_DETALLES = os.environ.get('MODO_DETALLES', MODO_COMPLETO)
+
+# Registros por lote de MERGE (los lotes se cargan mientras sigue la descarga)
+TAMANO_LOTE = int(os.environ.get('TAMANO_LOTE_MERGE', TAMANO_LOTE_DEFECTO))
+
+engine_oracle = None       # Se crea en el primer uso (obtener_engine)
+
+
+@dataclass(frozen=True)
+class ConfigSync:
+    """Lo que distingue la sincronización de un recurso de la de otro"""
+    recurso: str                    # 'deals' / 'tasks': cola, caché y métricas
+    nombre: str                     # Para los mensajes ('oportunidades')
+    esquema: object                 # esquemas.Esquema de la tabla destino
+    url: str                        # Listado; el detalle es f"{url}{id}/"
+    politica: object                # PoliticaReintentos del cliente
+    timeout: float = 30             # Por intento (listado y, por defecto, detalle)
+    pausa_base: float = 1           # Pausa del limitador ante saturación
+    timeout_detalle: float = None   # Por intento de detalle, si es distinto
+    plazo_detalle: float = None     # Plazo total de un detalle (incluye reintentos)
+
+
+# ============================================================================
+# RECURSOS (ENGINE Y CLIENTE)
+# ============================================================================
+
+def validar_entorno():
+    """Credenciales obligatorias; se comprueban al ejecutar, no al importar"""
+    if not all([API_TOKEN, ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN]):
+        raise ValueError("❌ Faltan variables de entorno. Verifica los Secrets en GitHub.")
+
+
+def obtener_engine():
+    """Engine de Oracle (pool compartido por todas las fases), creado en el primer uso"""
+    global engine_oracle
+    if engine_oracle is None:
+        # Una sesión por rango de MERGE en paralelo, más la de las consultas de control
+        engine_oracle = crear_engine(ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
+                                     maximo=max(POOL_MAX, MERGE_HILOS + 1))
+    return engine_oracle
+
+
+def crear_cliente(config):
+    """Cliente HTTP compartido por todas las fases de la sincronización"""
+    return ClientifyClient(
+        API_TOKEN,
+        concurrencia=CONCURRENCIA,
+        timeout=config.timeout,
+        politica=config.politica,
+        limitador=LimitadorAdaptativo(
+            tasa_inicial=TASA_INICIAL,
+            tasa_max=TASA_MAX,
+            concurrencia_max=CONCURRENCIA,
+            pausa_base=config.pausa_base,
+        ),
+    )
+
+
+# ============================================================================
+# LISTADO
+# ============================================================================
+
+def _params_pagina(fecha_filtro, page):
+    return {"modified[gte]": fecha_filtro, "page": page}
+
+
+async def obtener_estimacion(cliente, config, fecha_filtro):
+    """Devuelve (total, page_size, resultados de la página 1) para no pedirla dos veces"""
+    data = await cliente.get_json(config.url, params=_params_pagina(fecha_filtro, 1))
+    if data:
+        total = data.get("count", 0)
+        results = data.get("results", [])
+        page_size = len(results) if len(results) > 0 else 50
+        return total, page_size, results
+    return 0, 50, []
+
+
+async def _obtener_pagina(cliente, config, fecha_filtro, page):
+    """(page, resultados) o (page, None) si la página falló tras los reintentos"""
+    data = await cliente.get_json(config.url, params=_params_pagina(fecha_filtro, page))
+    return page, (data.get("results", []) if data is not None else None)
+
+
+async def obtener_paginas(cliente, config, fecha_filtro, total_paginas, primera_pagina):
+    """
+    Páginas 2..N en paralelo dentro del límite del cliente, reordenadas por número de página.
+    Devuelve (items, números de las páginas que fallaron)
+    """
+    paginas = {1: primera_pagina}
+    fallidas = []
+    tareas = [_obtener_pagina(cliente, config, fecha_filtro, page) for page in range(2, total_paginas + 1)]
+    with tqdm(total=total_paginas, initial=1, desc="Páginas", unit="pag", colour='cyan') as pbar:
+        for tarea in asyncio.as_completed(tareas):
+            page, results = await tarea
+            if results is None:
+                fallidas.append(page)
+                results = []
+            paginas[page] = results
+            pbar.update(1)
+
+    items = []
+    for page in range(1, total_paginas + 1):
+        items.extend(paginas[page])
+    return items, sorted(fallidas)
+
+
+async def seleccionar_items(config, lista_items):
+    """
+    Aplica MODO_DETALLES sobre el listado
+    Devuelve (items que necesitan detalle, items del listado usados como detalle)
+    """
+    if MODO_DETALLES != MODO_SELECTIVO:
+        return lista_items, []
+
+    modificados = await asyncio.to_thread(
+        cargar_modificados, obtener_engine(), config.esquema.tabla, [item['id'] for item in lista_items]
+    )
+    pendientes, desde_listado, sin_cambios = separar_items(lista_items, modificados, config.esquema.campos)
+
+    print(f"{Fore.WHITE}   ✓ Sin cambios en Oracle: {len(sin_cambios)}")
+    print(f"{Fore.WHITE}   ✓ Listado suficiente: {len(desde_listado)}")
+    print(f"{Fore.GREEN}   ✓ Llamadas de detalle ahorradas: {len(sin_cambios) + len(desde_listado)}/{len(lista_items)}\n")
+    return pendientes, desde_listado
+
+
+# ============================================================================
+# DETALLES
+# ============================================================================
+
+async def obtener_detalle(cliente, config, item, cache=None):
+    """
+    Detalle desde la caché local si esa versión ya se descargó; si no, de la API.
+    Devuelve (item_id, detalle, congelado); un error deja el detalle a None
+    """
+    item_id = item['id']
+    if cache:
+        detalle = cache.obtener(item_id, item.get('modified'))
+        if detalle:
+            return item_id, detalle, False
+
+    try:
+        detalle = await cliente.get_json(
+            f"{config.url}{item_id}/", timeout=config.timeout_detalle, plazo=config.plazo_detalle
+        )
+    except asyncio.TimeoutError:
+        return item_id, None, True
+    except Exception:
+        # Un ID que falla va a la cola de reintentos; no aborta la sincronización
+        return item_id, None, False
+    if detalle and cache:
+        cache.guardar(item_id, item.get('modified'), detalle)
+    return item_id, detalle, False
+
+
+async def iterar_detalles(cliente, config, lista_items, cache=None, cola=None):
+    """
+    Entrega los detalles según llegan (como mucho 2×CONCURRENCIA en curso).
+    Con `cola`, cada detalle queda persistido hasta su MERGE y cada fallo
+    se programa para reintento (o pasa a dead-letter)
+    """
+    ok = errores = congelados = muertos = 0
+    print(f"{Fore.WHITE}🔍 Detalles de {config.nombre} ({CONCURRENCIA} en paralelo)...")
+
+    tareas = (obtener_detalle(cliente, config, item, cache) for item in lista_items)
+    with tqdm(total=len(lista_items), desc="Detalles", unit="reg", colour='green') as pbar:
+        async for item_id, detalle, congelado in en_ventana(tareas, CONCURRENCIA * 2):
+            pbar.update(1)
+            if detalle:
+                ok += 1
+                if cola:
+                    cola.guardar_descargado(detalle)
+                yield detalle
+                continue
+
+            if congelado:
+                congelados += 1
+            else:
+                errores += 1
+            motivo = "plazo agotado" if congelado else "sin respuesta válida"
+            if cola and cola.registrar_fallo(item_id, motivo) == MUERTO:
+                muertos += 1
+
+    METRICAS.sumar("detalles_ok", ok)
+    METRICAS.sumar("detalles_error", errores)
+    METRICAS.sumar("detalles_plazo", congelados)
+    if errores or congelados:
+        print(f"{Fore.YELLOW}   ⚠️  {errores + congelados} detalles fallaron ({congelados} por plazo); "
+              f"quedan en cola para reintento ({muertos} a dead-letter)")
+
+
+# ============================================================================
+# PROCESAMIENTO Y MERGE
+# ============================================================================
+
+def procesar_datos(config, lista_datos):
+    """Detalles → DataFrame tipado listo para el MERGE (con ROW_HASH)"""
+    from normalizacion import normalizar     # pandas solo se carga si hay detalles
+
+    with METRICAS.fase("procesamiento"):
+        df = normalizar(lista_datos, config.esquema)
+        if df.empty:
+            return df
+        df[COLUMNA_HASH] = hash_filas(df)
+        METRICAS.sumar("filas", len(df))
+    return df
+
+
+def ejecutar_merge_oracle(config, df, engine, por_rangos=False):
+    """MERGE del lote en la tabla del esquema. Devuelve (insertados, actualizados, sin_cambios)"""
+    if df.empty:
+        return 0, 0, 0
+
+    esquema = config.esquema
+    try:
+        # Backfill: rangos de ID con commit propio, MERGE_HILOS a la vez
+        if por_rangos:
+            return merge_por_rangos(engine, esquema.tabla, df, esquema)
+
+        with engine.connect() as conn:
+            # DDL (solo la primera vez) antes de cargar: su commit implícito vaciaría la staging
+            asegurar_columna_hash(conn, esquema.tabla)
+            return cargar_y_mergear(conn, esquema.tabla, df, esquema, GRADO_PARALLEL_DML)
+
+    except Exception as e:
+        print(f"\n{Fore.RED}❌ Error en el MERGE: {e}")
+        raise
+
+
+# ============================================================================
+# FLUJO COMPLETO
+# ============================================================================
+
+async def sincronizar_cambios(config, fecha_filtro, cola, por_rangos=False):
+    """
+    Estimación y páginas, y luego detalles → lotes → MERGE en streaming,
+    todo sobre un único cliente HTTP compartido.
+    Incluye lo que dejó pendiente la ejecución anterior (cola de trabajo).
+    Devuelve (lotes, registros, watermark); registros es None si no había nada que sincronizar
+    """
+    # Los detalles sin mergear se leen de la cola por trozos dentro de _fuente
+    previos = cola.contar(DESCARGADO)
+    reintentos = cola.listos_para_reintento()
+    if previos or reintentos:
+        print(f"{Fore.WHITE}📬 Cola: {previos} detalles sin mergear, {len(reintentos)} IDs por reintentar\n")
+
+    async with crear_cliente(config) as cliente:
+        # 1. Estimación
+        print(f"{Fore.YELLOW}⏳ Calculando cambios desde {fecha_filtro}...")
+        with METRICAS.fase("estimacion"):
+            total, page_size, primera_pagina = await obtener_estimacion(cliente, config, fecha_filtro)
+        items = []
+        paginas_fallidas = []
+
+        if total == 0:
+            print(f"{Fore.GREEN}✅ No hay cambios\n")
+            if not previos and not reintentos:
+                return 0, None, None
+        else:
+            total_paginas = math.ceil(total / page_size)
+            print(f"{Fore.WHITE}   ✓ Detectados: {total} registros en {total_paginas} páginas\n")
+
+            # 2. Listado
+            with METRICAS.fase("listado"):
+                items, paginas_fallidas = await obtener_paginas(
+                    cliente, config, fecha_filtro, total_paginas, primera_pagina
+                )
+                METRICAS.sumar("filas", len(items))
+                METRICAS.sumar("paginas_fallidas", len(paginas_fallidas))
+
+            if paginas_fallidas:
+                print(f"{Fore.YELLOW}   ⚠️  Páginas sin descargar: {paginas_fallidas}; el watermark no avanzará\n")
+
+            if not items:
+                print(f"{Fore.RED}❌ No se obtuvieron datos\n")
+                return 0, None, None
+
+            print(f"{Fore.GREEN}   ✓ {len(items)} {config.nombre} encontradas\n")
+
+        # 3. Detalles (listado + reintentos de la cola)
+        with METRICAS.fase("seleccion"):
+            pendientes, desde_listado = await seleccionar_items(config, items) if items else ([], [])
+        listados = {item['id'] for item in pendientes}
+        pendientes += [{'id': item_id} for item_id in reintentos if item_id not in listados]
+
+        # Los IDs en dead-letter no se vuelven a pedir aunque sigan apareciendo en el listado
+        muertos = cola.ids_muertos()
+        if muertos:
+            descartados = sum(1 for item in pendientes if item['id'] in muertos)
+            pendientes = [item for item in pendientes if item['id'] not in muertos]
+            if descartados:
+                print(f"{Fore.YELLOW}   ⚠️  {descartados} IDs en dead-letter omitidos (python cola_trabajo.py {config.recurso})\n")
+
+        # Con páginas perdidas el listado está incompleto: el watermark se queda donde estaba
+        watermark = None if paginas_fallidas else maximo_modified(items)
+
+        if not pendientes and not desde_listado and not previos:
+            print(f"{Fore.GREEN}✅ Todo al día en Oracle\n")
+            return 0, None, watermark
+
+        cache = CacheDetalles.desde_entorno(config.recurso)
+        recibidos = set()
+
+        async def _fuente():
+            for detalle in cola.descargados():
+                yield detalle
+            for detalle in desde_listado:
+                yield detalle
+            if pendientes:
+                async for detalle in iterar_detalles(cliente, config, pendientes, cache, cola):
+                    recibidos.add(detalle['id'])
+                    yield detalle
+
+        def _cargar(df):
+            insertados, actualizados, sin_cambios = ejecutar_merge_oracle(config, df, obtener_engine(), por_rangos)
+            print(f"{Fore.GREEN}   ✓ Lote mergeado: {len(df)} registros "
+                  f"({insertados} nuevos, {actualizados} actualizados, {sin_cambios} sin cambios)")
+
+        # 4. Procesar y MERGE por lotes mientras se descargan los detalles
+        try:
+            with METRICAS.fase("detalles"):
+                lotes, registros = await ejecutar_por_lotes(
+                    _fuente(),
+                    procesar=partial(procesar_datos, config),
+                    cargar=_cargar,
+                    confirmar=lambda df: cola.confirmar(df['ID'].tolist()),
+                    tamano_lote=TAMANO_LOTE,
+                )
+                METRICAS.sumar("filas", registros)
+        finally:
+            if cache:
+                cache.cerrar()
+
+        if cache:
+            print(f"{Fore.WHITE}   ✓ Caché local: {cache.resumen()}")
+        print(f"{Fore.WHITE}   ✓ Ritmo final API: {cliente.limitador.resumen()}\n")
+
+        # El watermark no pasa de los detalles fallidos: en la próxima ejecución
+        # se vuelven a listar aunque la cola local (.cache) no sobreviva. Los que
+        # acaban en dead-letter no lo frenan: ya no se van a reintentar
+        muertos = cola.ids_muertos()
+        fallidos = [item for item in pendientes if item['id'] not in recibidos and item['id'] not in muertos]
+        return lotes, registros, limitar_watermark(watermark, fallidos)
+
+
+def main(config):
+    """Sincroniza el recurso de `config`: cola, cambios desde el watermark y MERGE en Oracle"""
+    inicio = time.time()
+    METRICAS.proceso = f"sync_{config.recurso}"
+    validar_entorno()
+
+    tabla = config.esquema.tabla
+    fecha_filtro, origen = calcular_fecha_filtro(obtener_engine(), tabla, DIAS_ATRAS, desde=FECHA_DESDE)
+    por_rangos = modo_por_rangos(origen)
+    cola = ColaTrabajo.desde_entorno(config.recurso)
+
+    print(f"\n{Fore.CYAN}{'='*80}")
+    print(f"{Fore.MAGENTA}🚀 SINCRONIZACIÓN {config.nombre.upper()}")
+    print(f"{Fore.CYAN}{'='*80}")
+    print(f"{Fore.WHITE}📅 Fecha corte: {fecha_filtro} ({origen})")
+    print(f"{Fore.WHITE}🎯 Tabla: {tabla}")
+    print(f"{Fore.WHITE}⚡ Concurrencia: {CONCURRENCIA} requests en vuelo")
+    print(f"{Fore.WHITE}🔍 Modo detalles: {MODO_DETALLES}")
+    print(f"{Fore.WHITE}📦 Lote de MERGE: {TAMANO_LOTE} registros"
+          + (f" (por rangos de ID, {MERGE_HILOS} hilos)" if por_rangos else ""))
+    print(f"{Fore.CYAN}{'='*80}\n")
+
+    try:
+        lotes, registros, watermark = asyncio.run(sincronizar_cambios(config, fecha_filtro, cola, por_rangos))
+
+        if registros == 0:
+            print(f"{Fore.RED}❌ No se obtuvieron detalles. Abortando.\n")
+            return
+
+        guardar_watermark(obtener_engine(), tabla, watermark)
+
+        if registros:
+            print(f"{Fore.GREEN}{'='*80}")
+            print(f"{Fore.GREEN}✅ SINCRONIZACIÓN EXITOSA: {registros} {config.nombre} en {lotes} lotes")
+            print(f"{Fore.GREEN}{'='*80}\n")
+
+    except Exception as e:
+        print(f"\n{Fore.RED}{'='*80}")
+        print(f"{Fore.RED}❌ ERROR: {e}")
+        print(f"{Fore.RED}{'='*80}\n")
+        raise
+
+    finally:
+        print(f"{Fore.WHITE}📬 Cola: {cola.resumen()}")
+        cola.cerrar()
+        METRICAS.escribir()
+        if engine_oracle is not None:
+            print(f"{Fore.WHITE}🔌 Oracle: {resumen_pool(engine_oracle)}")
+            cerrar_engine(engine_oracle)
+
+    mins, secs = divmod(time.time() - inicio, 60)
+    print(f"{Fore.CYAN}⏱️  Tiempo total: {int(mins)}m {int(secs)}s")
+    print(f"{Fore.CYAN}{'='*80}\n")
@@ -0,0 +1,174 @@
+# ============================================================================
+# ☁️ SUBIDA MULTIPART EN PARALELO A OCI OBJECT STORAGE
+# ============================================================================
+# - El archivo se parte en trozos de OCI_PARTE_MB y se suben OCI_HILOS_SUBIDA
+#   partes a la vez (multipart upload nativo de Object Storage)
+# - Cada parte lleva su Content-MD5 (OCI la rechaza si llega corrupta) y se
+#   reintenta por separado; si una parte se agota se aborta el upload entero
+# - Al confirmar se compara el opc-multipart-md5 devuelto por OCI con el
+#   calculado en local (MD5 de los MD5 de las partes + "-N")
+# - Archivos de una sola parte: put_object con Content-MD5
+# - `metadatos` viajan como opc-meta-* del objeto (p. ej. la huella del
+#   contenido); leer_metadatos los recupera con un HEAD
+# ============================================================================
+
+import base64
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from oci.exceptions import ConnectTimeout, RequestException, ServiceError
+from oci.object_storage.models import (
+    CommitMultipartUploadDetails,
+    CommitMultipartUploadPartDetails,
+    CreateMultipartUploadDetails,
+)
+
+from reintentos import PoliticaReintentos
+
+MB = 1024 * 1024
+PARTE_MINIMA = 10 * MB          # Mínimo de OCI para todas las partes menos la última
+TAMANO_PARTE = max(PARTE_MINIMA, int(os.environ.get("OCI_PARTE_MB", 32)) * MB)
+HILOS = int(os.environ.get("OCI_HILOS_SUBIDA", 8))
+POLITICA_PARTES = PoliticaReintentos(max_intentos=4, espera_base=2, espera_max=30)
+
+ESTADOS_REINTENTABLES = (408, 409, 429, 500, 502, 503, 504)
+PREFIJO_METADATOS = "opc-meta-"
+
+
+class ErrorIntegridad(Exception):
+    """El MD5 que devuelve OCI no coincide con el del archivo local"""
+
+
+def _md5(datos):
+    return hashlib.md5(datos).digest()
+
+
+def _b64(digest):
+    return base64.b64encode(digest).decode("ascii")
+
+
+# Red y timeouts (el SDK envuelve los de requests en RequestException / ConnectTimeout)
+ERRORES_RED = (ConnectTimeout, RequestException, ConnectionError, TimeoutError)
+
+
+def _reintentable(error):
+    """Errores de red y de servicio transitorios; cualquier otro (bug, archivo...) se relanza ya"""
+    if isinstance(error, ServiceError):
+        return error.status in ESTADOS_REINTENTABLES
+    return isinstance(error, ERRORES_RED)
+
+
+def _con_reintentos(operacion, politica, descripcion):
+    for intento in range(politica.max_intentos):
+        try:
+            return operacion()
+        except Exception as e:
+            if intento == politica.max_intentos - 1 or not _reintentable(e):
+                raise
+            espera = politica.espera(intento)
+            motivo = getattr(e, "status", None) or type(e).__name__
+            print(f"   ⚠️ {descripcion} falló ({motivo}); reintento en {espera:.1f}s")
+            time.sleep(espera)
+
+
+def _leer_parte(ruta, numero, tamano_parte):
+    with open(ruta, "rb") as f:
+        f.seek((numero - 1) * tamano_parte)
+        return f.read(tamano_parte)
+
+
+def leer_metadatos(client, namespace, bucket, nombre):
+    """Metadatos opc-meta-* del objeto (sin el prefijo), o None si no existe"""
+    try:
+        respuesta = client.head_object(namespace, bucket, nombre)
+    except Exception as e:
+        if getattr(e, "status", None) == 404:
+            return None
+        raise
+    return {
+        clave[len(PREFIJO_METADATOS):]: valor
+        for clave, valor in respuesta.headers.items()
+        if clave.lower().startswith(PREFIJO_METADATOS)
+    }
+
+
+def _subir_simple(client, namespace, bucket, nombre, ruta, politica, metadatos):
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    md5 = _b64(_md5(datos))
+
+    respuesta = _con_reintentos(
+        lambda: client.put_object(namespace, bucket, nombre, datos, content_md5=md5, opc_meta=metadatos),
+        politica, nombre,
+    )
+    remoto = respuesta.headers.get("opc-content-md5")
+    if remoto and remoto != md5:
+        raise ErrorIntegridad(f"{nombre}: MD5 local {md5} ≠ OCI {remoto}")
+    return {"partes": 1, "bytes": len(datos), "md5": md5, "version_id": respuesta.headers.get("version-id")}
+
+
+def subir_archivo(client, namespace, bucket, nombre, ruta,
+                  tamano_parte=TAMANO_PARTE, hilos=HILOS, politica=POLITICA_PARTES,
+                  al_subir_parte=None, metadatos=None):
+    """
+    Sube `ruta` como `nombre` (multipart en paralelo si supera una parte).
+    Devuelve {partes, bytes, md5, version_id}; lanza ErrorIntegridad si el MD5
+    no cuadra. version_id es None si el bucket no tiene versionado.
+    """
+    tamano = os.path.getsize(ruta)
+    if tamano <= tamano_parte:
+        resultado = _subir_simple(client, namespace, bucket, nombre, ruta, politica, metadatos)
+        if al_subir_parte:
+            al_subir_parte(tamano)
+        return resultado
+
+    total_partes = -(-tamano // tamano_parte)
+    upload_id = client.create_multipart_upload(
+        namespace, bucket, CreateMultipartUploadDetails(
+            object=nombre,
+            metadata={f"{PREFIJO_METADATOS}{k}": v for k, v in (metadatos or {}).items()},
+        ),
+    ).data.upload_id
+
+    def _subir_parte(numero):
+        datos = _leer_parte(ruta, numero, tamano_parte)
+        digest = _md5(datos)
+        respuesta = _con_reintentos(
+            lambda: client.upload_part(
+                namespace, bucket, nombre, upload_id, numero, datos, content_md5=_b64(digest)
+            ),
+            politica, f"{nombre} parte {numero}/{total_partes}",
+        )
+        if al_subir_parte:
+            al_subir_parte(len(datos))
+        return numero, respuesta.headers["etag"], digest
+
+    try:
+        partes = {}
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            for futuro in as_completed([pool.submit(_subir_parte, n) for n in range(1, total_partes + 1)]):
+                numero, etag, digest = futuro.result()
+                partes[numero] = (etag, digest)
+
+        respuesta = client.commit_multipart_upload(
+            namespace, bucket, nombre, upload_id,
+            CommitMultipartUploadDetails(parts_to_commit=[
+                CommitMultipartUploadPartDetails(part_num=n, etag=partes[n][0]) for n in sorted(partes)
+            ]),
+        )
+    except BaseException:
+        try:
+            client.abort_multipart_upload(namespace, bucket, nombre, upload_id)
+        except Exception as e:
+            print(f"   ⚠️ No se pudo abortar el multipart de {nombre}: {e}")
+        raise
+
+    esperado = f"{_b64(_md5(b''.join(partes[n][1] for n in sorted(partes))))}-{total_partes}"
+    remoto = respuesta.headers.get("opc-multipart-md5")
+    if remoto != esperado:
+        raise ErrorIntegridad(f"{nombre}: MD5 multipart local {esperado} ≠ OCI {remoto}")
+
+    return {"partes": total_partes, "bytes": tamano, "md5": esperado,
+            "version_id": respuesta.headers.get("version-id")}
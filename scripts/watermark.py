@@ -0,0 +1,134 @@
+# ============================================================================
+# 🕒 WATERMARK: PUNTO DE PARTIDA DE CADA SINCRONIZACIÓN
+# ============================================================================
+# - Se guarda en Oracle (tabla de control) el máximo `modified` mergeado
+# - La siguiente ejecución arranca desde ahí menos un margen de solape
+# - Sin watermark previo se usa la ventana fija de DIAS_ATRAS
+# ============================================================================
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.exc import DatabaseError
+
+TABLA_CONTROL = "SYNC_WATERMARKS"
+MARGEN_SOLAPE = timedelta(minutes=15)
+ORA_YA_EXISTE = 955
+
+_tabla_control_lista = False
+
+
+def parsear_fecha(valor):
+    """Fecha ISO de Clientify (con 'Z' u offset) a datetime UTC, o None"""
+    if not valor:
+        return None
+    try:
+        fecha = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return fecha.astimezone(timezone.utc)
+
+
+def _codigo_oracle(error):
+    """Código ORA-nnnnn de un DatabaseError de SQLAlchemy sobre oracledb, o None"""
+    detalle = error.orig.args[0] if getattr(error.orig, "args", None) else None
+    return getattr(detalle, "code", None)
+
+
+def asegurar_tabla_control(conn):
+    """Crea la tabla de control la primera vez que se usa en el proceso (ORA-00955 si ya existe)"""
+    global _tabla_control_lista
+    if _tabla_control_lista:
+        return
+    try:
+        conn.execute(text(f"""
+            CREATE TABLE "{TABLA_CONTROL}" (
+                "TABLA" VARCHAR2(128) PRIMARY KEY,
+                "WATERMARK" VARCHAR2(64),
+                "ACTUALIZADO" TIMESTAMP WITH TIME ZONE
+            )
+        """))
+        conn.commit()
+    except DatabaseError as e:
+        conn.rollback()
+        if _codigo_oracle(e) != ORA_YA_EXISTE:
+            raise
+    _tabla_control_lista = True
+
+
+def leer_watermark(engine, tabla):
+    """Último watermark guardado para la tabla, o None"""
+    with engine.connect() as conn:
+        asegurar_tabla_control(conn)
+        fila = conn.execute(
+            text(f'SELECT "WATERMARK" FROM "{TABLA_CONTROL}" WHERE "TABLA" = :tabla'),
+            {"tabla": tabla},
+        ).fetchone()
+    return parsear_fecha(fila[0]) if fila else None
+
+
+def calcular_fecha_filtro(engine, tabla, dias_atras, margen=MARGEN_SOLAPE, desde=None):
+    """
+    Fecha desde la que pedir cambios a la API.
+    Devuelve (fecha_iso, origen) con origen 'manual', 'watermark' o 'ventana'.
+    """
+    if desde:
+        fecha = parsear_fecha(desde)
+        if fecha is None:
+            raise ValueError(f"❌ FECHA_DESDE no es una fecha ISO válida: {desde!r}")
+        return fecha.isoformat(), "manual"
+
+    watermark = leer_watermark(engine, tabla)
+    if watermark:
+        return (watermark - margen).isoformat(), "watermark"
+
+    return (datetime.now(timezone.utc) - timedelta(days=dias_atras)).isoformat(), "ventana"
+
+
+def maximo_modified(registros):
+    """Máximo `modified` de una lista de registros de Clientify, o None"""
+    fechas = [parsear_fecha(r.get("modified")) for r in registros]
+    fechas = [f for f in fechas if f is not None]
+    return max(fechas) if fechas else None
+
+
+def limitar_watermark(watermark, fallidos):
+    """
+    Watermark que no deja atrás registros sin sincronizar: como mucho el menor
+    `modified` de los items listados cuyo detalle falló (modified[gte] los
+    vuelve a listar en la próxima ejecución aunque se pierda la cola local).
+    Los fallidos sin `modified` (reintentos de la cola fuera del listado) ya
+    quedaron por detrás del watermark en su día y no lo limitan.
+    """
+    tope = min((f for f in (parsear_fecha(i.get("modified")) for i in fallidos) if f), default=None)
+    if watermark is None or tope is None:
+        return watermark
+    return min(watermark, tope)
+
+
+def guardar_watermark(engine, tabla, watermark):
+    """Avanza el watermark de la tabla (nunca lo retrocede)"""
+    if watermark is None:
+        return
+
+    anterior = leer_watermark(engine, tabla)
+    if anterior and anterior >= watermark:
+        return
+
+    with engine.connect() as conn:
+        conn.execute(
+            text(f"""
+                MERGE INTO "{TABLA_CONTROL}" T
+                USING (SELECT :tabla AS "TABLA" FROM DUAL) S
+                ON (T."TABLA" = S."TABLA")
+                WHEN MATCHED THEN
+                    UPDATE SET T."WATERMARK" = :watermark, T."ACTUALIZADO" = SYSTIMESTAMP
+                WHEN NOT MATCHED THEN
+                    INSERT ("TABLA", "WATERMARK", "ACTUALIZADO")
+                    VALUES (:tabla, :watermark, SYSTIMESTAMP)
+            """),
+            {"tabla": tabla, "watermark": watermark.isoformat()},
+        )
+        conn.commit()
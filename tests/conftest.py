@@ -0,0 +1,5 @@
+# Los scripts son módulos planos de scripts/ que se importan entre sí por nombre
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "scripts"))
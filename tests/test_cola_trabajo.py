@@ -0,0 +1,55 @@
+# ============================================================================
+# 🧪 cola_trabajo.ColaTrabajo: DEAD-LETTER Y LECTURA POR TROZOS
+# ============================================================================
+
+import pytest
+
+from cola_trabajo import DESCARGADO, MUERTO, PENDIENTE, ColaTrabajo
+
+
+@pytest.fixture
+def cola(tmp_path):
+    cola = ColaTrabajo(str(tmp_path / "cola.sqlite"), "deals", max_intentos=3)
+    yield cola
+    cola.cerrar()
+
+
+def test_un_id_muerto_que_vuelve_a_fallar_sigue_muerto(cola):
+    estados = [cola.registrar_fallo(7, "sin respuesta válida") for _ in range(5)]
+
+    assert estados == [PENDIENTE, PENDIENTE, MUERTO, MUERTO, MUERTO]
+    assert cola.ids_muertos() == {7}
+    assert cola.muertos()[0][1] == 5
+    assert 7 not in cola.listos_para_reintento()
+
+
+def test_confirmar_saca_de_dead_letter(cola):
+    for _ in range(3):
+        cola.registrar_fallo(7, "sin respuesta válida")
+
+    cola.confirmar([7])
+
+    assert cola.ids_muertos() == set()
+
+
+def test_descargados_se_leen_por_trozos_en_orden(cola):
+    for item_id in (5, 3, 1, 4, 2):
+        cola.guardar_descargado({"id": item_id})
+
+    detalles = cola.descargados(por_lectura=2)
+
+    assert [d["id"] for d in detalles] == [1, 2, 3, 4, 5]
+    assert cola.contar(DESCARGADO) == 5
+
+
+def test_descargados_no_entrega_lo_guardado_durante_el_recorrido(cola):
+    for item_id in range(1, 6):
+        cola.guardar_descargado({"id": item_id})
+
+    vistos = []
+    for detalle in cola.descargados(por_lectura=2):
+        vistos.append(detalle["id"])
+        if detalle["id"] == 1:
+            cola.guardar_descargado({"id": 99})
+
+    assert vistos == [1, 2, 3, 4, 5]
@@ -0,0 +1,51 @@
+# ============================================================================
+# 🧪 decodificacion_json.columna_json: TIPOS DECLARADOS SIN PERDER DATOS
+# ============================================================================
+
+import pyarrow as pa
+
+from decodificacion_json import columna_json
+from esquemas import CAMPOS_PERSONALIZADOS, LISTA_TEXTO, REFERENCIAS
+
+
+def test_celdas_que_encajan_no_dejan_originales():
+    textos = pa.array(['[{"id": 1, "name": "Piso", "url": "u"}]', None, "[]"])
+
+    columna, originales = columna_json(textos, REFERENCIAS)
+
+    assert columna.type == REFERENCIAS
+    assert columna.to_pylist() == [[{"id": 1, "name": "Piso", "url": "u"}], None, []]
+    assert originales is None
+
+
+def test_clave_no_declarada_guarda_la_celda_original():
+    con_extra = '[{"id": 1, "name": "Piso", "url": "u", "price": "120000.00", "quantity": 1}]'
+    textos = pa.array([con_extra, '[{"id": 2, "name": "x", "url": "v"}]'])
+
+    columna, originales = columna_json(textos, REFERENCIAS)
+
+    assert columna.to_pylist()[0] == [{"id": 1, "name": "Piso", "url": "u"}]
+    assert originales == [con_extra, None]
+
+
+def test_texto_que_no_es_json_se_conserva():
+    columna, originales = columna_json(pa.array(["no es json", '["a"]']), LISTA_TEXTO)
+
+    assert columna.to_pylist() == [None, ["a"]]
+    assert originales == ["no es json", None]
+
+
+def test_tipo_distinto_se_conserva():
+    columna, originales = columna_json(pa.array(['{"field": "x"}']), CAMPOS_PERSONALIZADOS)
+
+    assert columna.to_pylist() == [None]
+    assert originales == ['{"field": "x"}']
+
+
+def test_columna_de_texto_se_devuelve_tal_cual():
+    textos = pa.array(['[{"entrada": 1}]'])
+
+    columna, originales = columna_json(textos, pa.string())
+
+    assert columna is textos
+    assert originales is None
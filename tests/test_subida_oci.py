@@ -0,0 +1,140 @@
+# ============================================================================
+# 🧪 subida_oci.subir_archivo CONTRA EL OBJECT STORAGE LOCAL
+# ============================================================================
+
+import os
+
+import pytest
+from oci.exceptions import ServiceError
+
+from object_storage_local import ObjectStorageLocal
+from reintentos import PoliticaReintentos
+from subida_oci import ErrorIntegridad, subir_archivo
+
+NS, BUCKET, NOMBRE = "ns", "bucket", "datos/archivo.parquet"
+PARTE = 1024
+SIN_ESPERA = PoliticaReintentos(max_intentos=3, espera_base=0, espera_max=0)
+
+
+@pytest.fixture
+def archivo(tmp_path):
+    ruta = tmp_path / "origen.bin"
+    ruta.write_bytes(os.urandom(PARTE * 3 + 100))     # 4 partes, la última corta
+    return ruta
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return ObjectStorageLocal(str(tmp_path / "oci"))
+
+
+def _subir(client, ruta, **kwargs):
+    return subir_archivo(client, NS, BUCKET, NOMBRE, str(ruta), tamano_parte=PARTE, hilos=4,
+                         politica=SIN_ESPERA, **kwargs)
+
+
+def _contenido(client):
+    return client.get_object(NS, BUCKET, NOMBRE).data.content
+
+
+def _llamadas(client, operacion):
+    return [llamada for llamada in client.llamadas if llamada[0] == operacion]
+
+
+def test_multipart_parte_el_archivo_y_verifica_md5(storage, archivo):
+    subidos = []
+    resultado = _subir(storage, archivo, al_subir_parte=subidos.append, metadatos={"huella": "abc"})
+
+    assert resultado["partes"] == 4
+    assert resultado["md5"].endswith("-4")
+    assert resultado["version_id"]
+    assert sorted(n for _, _, n in _llamadas(storage, "upload_part")) == [1, 2, 3, 4]
+    assert sum(subidos) == resultado["bytes"] == os.path.getsize(archivo)
+    assert _contenido(storage) == archivo.read_bytes()
+    assert storage.head_object(NS, BUCKET, NOMBRE).headers["opc-meta-huella"] == "abc"
+
+
+def test_parte_fallida_se_reintenta(tmp_path, archivo):
+    storage = ObjectStorageLocal(str(tmp_path / "oci"), fallos_partes={2: 2})
+
+    _subir(storage, archivo)
+
+    assert [n for _, _, n in _llamadas(storage, "upload_part")].count(2) == 3
+    assert _contenido(storage) == archivo.read_bytes()
+    assert not _llamadas(storage, "abort_multipart_upload")
+
+
+def test_parte_que_agota_los_reintentos_aborta(tmp_path, archivo):
+    storage = ObjectStorageLocal(str(tmp_path / "oci"), fallos_partes={3: 10})
+
+    with pytest.raises(ServiceError) as error:
+        _subir(storage, archivo)
+
+    assert error.value.status == 503
+    assert _llamadas(storage, "abort_multipart_upload")
+    assert not _llamadas(storage, "commit_multipart_upload")
+    with pytest.raises(ServiceError):
+        storage.head_object(NS, BUCKET, NOMBRE)
+
+
+class _PartesCorruptas(ObjectStorageLocal):
+    """Los bytes de la parte 2 llegan alterados: el Content-MD5 no cuadra"""
+
+    def upload_part(self, namespace_name, bucket_name, object_name, upload_id, upload_part_num,
+                    upload_part_body, **kwargs):
+        if upload_part_num == 2:
+            upload_part_body = b"x" + bytes(upload_part_body)[1:]
+        return super().upload_part(namespace_name, bucket_name, object_name, upload_id,
+                                   upload_part_num, upload_part_body, **kwargs)
+
+
+def test_md5_de_parte_distinto_aborta_sin_reintentar(tmp_path, archivo):
+    storage = _PartesCorruptas(str(tmp_path / "oci"))
+
+    with pytest.raises(ServiceError) as error:
+        _subir(storage, archivo)
+
+    assert error.value.status == 400
+    assert [n for _, _, n in _llamadas(storage, "upload_part")].count(2) == 1
+    assert _llamadas(storage, "abort_multipart_upload")
+    assert not _llamadas(storage, "commit_multipart_upload")
+
+
+class _Md5MultipartErroneo(ObjectStorageLocal):
+    def commit_multipart_upload(self, *args, **kwargs):
+        respuesta = super().commit_multipart_upload(*args, **kwargs)
+        respuesta.headers["opc-multipart-md5"] = "AAAAAAAAAAAAAAAAAAAAAA==-4"
+        return respuesta
+
+
+def test_md5_multipart_distinto_lanza_error_de_integridad(tmp_path, archivo):
+    with pytest.raises(ErrorIntegridad):
+        _subir(_Md5MultipartErroneo(str(tmp_path / "oci")), archivo)
+
+
+def test_archivo_pequeno_va_en_un_solo_put(storage, tmp_path):
+    ruta = tmp_path / "pequeno.bin"
+    ruta.write_bytes(b"hola" * 10)
+
+    resultado = _subir(storage, ruta, metadatos={"registros": "10"})
+
+    assert resultado["partes"] == 1
+    assert len(_llamadas(storage, "put_object")) == 1
+    assert not _llamadas(storage, "create_multipart_upload")
+    assert _contenido(storage) == ruta.read_bytes()
+    assert storage.head_object(NS, BUCKET, NOMBRE).headers["opc-meta-registros"] == "10"
+
+
+def test_errores_no_transitorios_no_se_reintentan(storage, tmp_path):
+    ruta = tmp_path / "pequeno.bin"
+    ruta.write_bytes(b"hola")
+    intentos = []
+
+    def _put_roto(*args, **kwargs):
+        intentos.append(1)
+        raise ValueError("bug local")
+
+    storage.put_object = _put_roto
+    with pytest.raises(ValueError):
+        _subir(storage, ruta)
+    assert len(intentos) == 1